@@ -0,0 +1,37 @@
+import argparse
+import json
+
+from gencontent import ENGINES
+from bench.run import default_template_path, run_benchmarks, run_synthetic
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time each stage of the site generator and report throughput as JSON.")
+    parser.add_argument("--pages", type=int, default=200, help="number of synthetic pages to generate")
+    parser.add_argument("--min-size", type=int, default=1024, help="smallest synthetic page in bytes")
+    parser.add_argument("--max-size", type=int, default=64 * 1024, help="largest synthetic page in bytes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is reported")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes for the full build stage")
+    parser.add_argument("--engine", choices=ENGINES, default="sync", help="build engine for the full build stage")
+    parser.add_argument("--content", help="benchmark an existing content directory instead of a synthetic one")
+    parser.add_argument("--template", default=default_template_path)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.content:
+        report = run_benchmarks(args.content, args.template, args.repeat, args.jobs, args.engine)
+    else:
+        report = run_synthetic(args.pages, args.min_size, args.max_size, args.seed, args.repeat, args.jobs, args.template, args.engine)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
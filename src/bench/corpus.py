@@ -0,0 +1,104 @@
+import os
+import random
+
+
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "ulist": 2,
+    "olist": 1,
+    "code": 1,
+    "quote": 1,
+}
+DEFAULT_INLINE_MIX = {
+    "text": 40,
+    "bold": 3,
+    "italic": 3,
+    "code": 2,
+    "link": 2,
+    "image": 1,
+}
+WORDS = (
+    "the ring was taken to the mountain by a hobbit of the shire while "
+    "elves and men held the gate against the shadow in the east and the "
+    "wizard rode north to find the white council gathered at rivendell"
+).split()
+
+
+def pick(rng, mix):
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def inline_text(rng, count, inline_mix):
+    parts = []
+    for _ in range(count):
+        kind = pick(rng, inline_mix)
+        if kind == "text":
+            parts.append(words(rng, rng.randint(1, 4)))
+        elif kind == "bold":
+            parts.append(f"**{words(rng, 2)}**")
+        elif kind == "italic":
+            parts.append(f"_{words(rng, 2)}_")
+        elif kind == "code":
+            parts.append(f"`{rng.choice(WORDS)}()`")
+        elif kind == "link":
+            parts.append(f"[{words(rng, 2)}](/pages/{rng.randint(0, 999)})")
+        else:
+            parts.append(f"![{words(rng, 2)}](/images/{rng.randint(0, 99)}.png)")
+    return " ".join(parts)
+
+
+def block_markdown(rng, kind, inline_mix):
+    if kind == "heading":
+        return "#" * rng.randint(2, 6) + " " + inline_text(rng, 3, inline_mix)
+    if kind == "ulist":
+        return "\n".join("- " + inline_text(rng, 4, inline_mix) for _ in range(rng.randint(2, 8)))
+    if kind == "olist":
+        return "\n".join(f"{i}. " + inline_text(rng, 4, inline_mix) for i in range(1, rng.randint(2, 8) + 1))
+    if kind == "code":
+        lines = [f"print({rng.choice(WORDS)!r})" for _ in range(rng.randint(2, 12))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if kind == "quote":
+        return "\n".join("> " + inline_text(rng, 4, inline_mix) for _ in range(rng.randint(1, 4)))
+    return inline_text(rng, rng.randint(10, 40), inline_mix)
+
+
+def page_markdown(rng, size, block_mix, inline_mix):
+    blocks = ["# " + words(rng, 4)]
+    length = len(blocks[0])
+    while length < size:
+        block = block_markdown(rng, pick(rng, block_mix), inline_mix)
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_sizes(rng, pages, min_size, max_size):
+    # Sizes are spread log-uniformly, so a 1 KB to 10 MB range yields mostly
+    # small pages with a tail of very large ones, like a real site.
+    if min_size >= max_size:
+        return [min_size] * pages
+    low = min_size.bit_length()
+    high = max_size.bit_length()
+    return [min(max_size, max(min_size, int(2 ** rng.uniform(low, high)))) for _ in range(pages)]
+
+
+def generate_site(dest_dir_path, pages, min_size=1024, max_size=64 * 1024, seed=0, block_mix=None, inline_mix=None):
+    # Writes a reproducible synthetic content tree; the same arguments always
+    # produce byte-identical files. Returns the paths of the written pages.
+    rng = random.Random(seed)
+    block_mix = block_mix or DEFAULT_BLOCK_MIX
+    inline_mix = inline_mix or DEFAULT_INLINE_MIX
+    paths = []
+    for number, size in enumerate(page_sizes(rng, pages, min_size, max_size)):
+        dir_path = os.path.join(dest_dir_path, f"section{number % 10}", f"page{number}")
+        os.makedirs(dir_path, exist_ok=True)
+        path = os.path.join(dir_path, "index.md")
+        with open(path, "w") as f:
+            f.write(page_markdown(rng, size, block_mix, inline_mix))
+        paths.append(path)
+    return paths
@@ -0,0 +1,93 @@
+import contextlib
+import os
+import tempfile
+import time
+
+from gencontent import generate_pages_recursive
+from inline_markdown import text_to_textnodes
+from markdown_blocks import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node
+
+from bench.corpus import generate_site
+
+
+MB = 1024 * 1024
+default_template_path = os.path.join(os.path.dirname(__file__), "..", "..", "template.html")
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def throughput(seconds, pages, size):
+    return {
+        "seconds": round(seconds, 6),
+        "pages_per_sec": round(pages / seconds, 2) if seconds else None,
+        "mb_per_sec": round(size / MB / seconds, 2) if seconds else None,
+    }
+
+
+def run_benchmarks(content_dir_path, template_path, repeat=3, jobs=1, engine="sync"):
+    paths = []
+    for dir_path, _, filenames in os.walk(content_dir_path):
+        for filename in filenames:
+            if filename.endswith(".md"):
+                paths.append(os.path.join(dir_path, filename))
+    paths.sort()
+    documents = []
+    for path in paths:
+        with open(path, "r") as f:
+            documents.append(f.read())
+
+    pages = len(documents)
+    markdown_size = sum(len(document.encode()) for document in documents)
+    blocks = [block for document in documents for block in markdown_to_blocks(document)]
+    blocks_size = sum(len(block.encode()) for block in blocks)
+    inline_texts = [
+        " ".join(block.split("\n")) for block in blocks if block_to_block_type(block) == BlockType.PARAGRAPH
+    ]
+    inline_size = sum(len(text.encode()) for text in inline_texts)
+    nodes = [markdown_to_html_node(document) for document in documents]
+
+    def build_site():
+        with tempfile.TemporaryDirectory() as dest_dir_path:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                generate_pages_recursive(content_dir_path, template_path, dest_dir_path, "/", jobs=jobs, engine=engine)
+
+    stages = {
+        "markdown_to_blocks": (lambda: [markdown_to_blocks(document) for document in documents], markdown_size),
+        "block_to_block_type": (lambda: [block_to_block_type(block) for block in blocks], blocks_size),
+        "text_to_textnodes": (lambda: [text_to_textnodes(text) for text in inline_texts], inline_size),
+        "markdown_to_html_node": (lambda: [markdown_to_html_node(document) for document in documents], markdown_size),
+        "to_html": (lambda: [node.to_html() for node in nodes], markdown_size),
+        "generate_pages_recursive": (build_site, markdown_size),
+    }
+    results = {}
+    for name, (func, size) in stages.items():
+        results[name] = throughput(best_time(func, repeat), pages, size)
+    return {
+        "corpus": {
+            "pages": pages,
+            "markdown_bytes": markdown_size,
+            "blocks": len(blocks),
+            "inline_texts": len(inline_texts),
+        },
+        "repeat": repeat,
+        "jobs": jobs,
+        "engine": engine,
+        "stages": results,
+    }
+
+
+def run_synthetic(pages, min_size, max_size, seed, repeat=3, jobs=1, template_path=default_template_path, engine="sync"):
+    with tempfile.TemporaryDirectory() as content_dir_path:
+        generate_site(content_dir_path, pages, min_size, max_size, seed)
+        report = run_benchmarks(content_dir_path, template_path, repeat, jobs, engine)
+    report["corpus"].update({"seed": seed, "min_size": min_size, "max_size": max_size})
+    return report
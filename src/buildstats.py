@@ -0,0 +1,152 @@
+import json
+import os
+import time
+
+
+class BuildStats():
+    # Accumulates exclusive time per build stage, overall and per page: time
+    # spent in a nested stage is only counted against the inner one.
+    def __init__(self):
+        self.stages = {}
+        self.pages = {}
+        self.stack = []
+        self.page = None
+
+    def add(self, name, seconds):
+        totals = self.stages.get(name)
+        if totals is None:
+            totals = self.stages[name] = [0.0, 0]
+        totals[0] += seconds
+        totals[1] += 1
+        if self.page is not None:
+            page = self.pages.setdefault(self.page, {})
+            page[name] = page.get(name, 0.0) + seconds
+
+    def merge(self, other):
+        for name, (seconds, calls) in other.stages.items():
+            totals = self.stages.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+        for path, stages in other.pages.items():
+            page = self.pages.setdefault(path, {})
+            for name, seconds in stages.items():
+                page[name] = page.get(name, 0.0) + seconds
+
+    def to_dict(self, wall_seconds=None):
+        pages = {}
+        for path, stages in self.pages.items():
+            pages[path] = dict(stages, total=sum(stages.values()))
+        return {
+            "wall_seconds": wall_seconds,
+            "stages": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in self.stages.items()},
+            "pages": pages,
+        }
+
+    def summary(self, wall_seconds=None, slowest=10):
+        lines = []
+        total = sum(seconds for seconds, _ in self.stages.values())
+        lines.append(f"{'stage':<12} {'seconds':>10} {'calls':>8} {'share':>7}")
+        for name, (seconds, calls) in sorted(self.stages.items(), key=lambda item: -item[1][0]):
+            share = seconds / total * 100 if total else 0.0
+            lines.append(f"{name:<12} {seconds:>10.4f} {calls:>8} {share:>6.1f}%")
+        if wall_seconds is not None:
+            lines.append(f"{'wall':<12} {wall_seconds:>10.4f}")
+        if self.pages:
+            lines.append("")
+            lines.append("slowest pages:")
+            totals = sorted(((sum(stages.values()), path) for path, stages in self.pages.items()), reverse=True)
+            for seconds, path in totals[:slowest]:
+                lines.append(f"{seconds:>10.4f}  {path}")
+        return "\n".join(lines)
+
+    def write_trace(self, path, wall_seconds=None):
+        dir_path = os.path.dirname(path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(wall_seconds), f, indent=1, sort_keys=True)
+
+
+class StageTimer():
+    __slots__ = ("stats", "name", "start", "children")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.children = 0.0
+        self.stats.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        stack = self.stats.stack
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        self.stats.add(self.name, elapsed - self.children)
+        return False
+
+
+class PageScope():
+    __slots__ = ("stats", "path", "previous")
+
+    def __init__(self, stats, path):
+        self.stats = stats
+        self.path = path
+
+    def __enter__(self):
+        self.previous = self.stats.page
+        self.stats.page = self.path
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats.page = self.previous
+        return False
+
+
+class NullScope():
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SCOPE = NullScope()
+current = None
+
+
+def enable():
+    global current
+    current = BuildStats()
+    return current
+
+
+def disable():
+    global current
+    current = None
+
+
+def stage(name):
+    # Hooks cost one global lookup and a shared no-op context manager when
+    # profiling is off.
+    if current is None:
+        return NULL_SCOPE
+    return StageTimer(current, name)
+
+
+def page(path):
+    if current is None:
+        return NULL_SCOPE
+    return PageScope(current, path)
+
+
+def record(name, seconds):
+    # For time measured elsewhere, such as on another thread.
+    if current is not None:
+        current.add(name, seconds)
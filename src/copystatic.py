@@ -1,16 +1,90 @@
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
+from discover import walk_files
+from output import prune_empty_dirs
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
 
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
-        else:
-            copy_files_recursive(from_path, dest_path)
+def sync_files(source_dir_path, dest_dir_path, previous=(), threads=8, link=False, names=None, files=None):
+    # Brings dest_dir_path up to date with source_dir_path, copying only files
+    # whose size or modification time differ, and removing files listed in
+    # previous (the result of the last sync) that no longer exist in the
+    # source. Other files in dest_dir_path, such as generated pages, are left
+    # alone. names optionally maps a source path to a different destination
+    # path. files is the (rel_path, stat) list of source_dir_path if the
+    # caller has already scanned it. Returns the relative destination paths
+    # of the synced files.
+    names = names or {}
+    if files is None:
+        files = scan_files(source_dir_path)
+    files = [(names.get(rel_path, rel_path), stat, rel_path) for rel_path, stat in files]
+    pending = []
+    for rel_path, stat, source_rel_path in files:
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        if is_up_to_date(stat, dest_path):
+            continue
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        pending.append((os.path.join(source_dir_path, source_rel_path), dest_path))
+
+    copy = link_file if link else copy_file
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(copy, from_path, dest_path) for from_path, dest_path in pending]
+        for (from_path, dest_path), future in zip(pending, futures):
+            future.result()
+            print(f" * {from_path} -> {dest_path}")
+
+    synced = [rel_path for rel_path, _, _ in files]
+    current = set(synced)
+    for rel_path in sorted(set(previous) - current):
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+            prune_empty_dirs(os.path.dirname(dest_path), dest_dir_path)
+            print(f" - removed {dest_path}")
+    return synced
+
+
+def scan_files(source_dir_path):
+    return list(walk_files(source_dir_path))
+
+
+def is_up_to_date(stat, dest_path):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    return dest_stat.st_size == stat.st_size and dest_stat.st_mtime_ns == stat.st_mtime_ns
+
+
+def link_file(from_path, dest_path):
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    try:
+        os.link(from_path, dest_path)
+    except OSError:
+        copy_file(from_path, dest_path)
+
+
+def copy_file(from_path, dest_path):
+    # The destination is unlinked first: it may be a hard link to the source,
+    # and truncating it in place would truncate the source too.
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if not copy_in_kernel(from_path, dest_path):
+        shutil.copyfile(from_path, dest_path)
+    shutil.copystat(from_path, dest_path)
+
+
+def copy_in_kernel(from_path, dest_path):
+    # os.copy_file_range lets the kernel (or a reflink-capable filesystem)
+    # copy the data without passing it through user space.
+    if not hasattr(os, "copy_file_range"):
+        return False
+    try:
+        with open(from_path, "rb") as from_file, open(dest_path, "wb") as dest_file:
+            while os.copy_file_range(from_file.fileno(), dest_file.fileno(), 1 << 30) > 0:
+                pass
+    except OSError:
+        return False
+    return True
@@ -0,0 +1,25 @@
+import os
+
+
+def walk_files(root):
+    # Yields (rel_path, stat) for every file under root: depth first, each
+    # directory's entries in name order, one scandir per directory and no
+    # recursion. stat comes from the directory entry and is meant to be
+    # passed along, so later stages do not stat the file again.
+    stack = [("", iter(sorted_entries(root)))]
+    while stack:
+        rel_dir, entries = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        rel_path = os.path.join(rel_dir, entry.name)
+        if entry.is_dir():
+            stack.append((rel_path, iter(sorted_entries(entry.path))))
+        else:
+            yield rel_path, entry.stat()
+
+
+def sorted_entries(dir_path):
+    with os.scandir(dir_path) as entries:
+        return sorted(entries, key=lambda entry: entry.name)
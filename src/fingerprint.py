@@ -0,0 +1,72 @@
+import json
+import os
+
+from copystatic import scan_files
+from manifest import hash_file
+from output import write_if_changed
+
+
+ASSET_MANIFEST = "asset-manifest.json"
+HASH_LENGTH = 8
+
+# Files that clients and hosts look up by their exact path keep their name.
+UNHASHED_NAMES = ("robots.txt", "favicon.ico", "CNAME", "sitemap.xml", "humans.txt", "ads.txt")
+UNHASHED_DIRS = (".well-known/",)
+
+
+def keeps_name(rel_path):
+    rel_path = rel_path.replace(os.sep, "/")
+    return rel_path in UNHASHED_NAMES or rel_path.startswith(UNHASHED_DIRS)
+
+
+def fingerprint_name(rel_path, digest):
+    # images/tom.png -> images/tom.<hash>.png
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def hash_files(source_dir_path, files, previous=None):
+    # {rel_path: {"hash", "size", "mtime"}} for the files to be renamed, from
+    # (rel_path, stat) pairs. Files whose size and mtime match their entry in
+    # previous (the result of the last build) are not read again.
+    previous = previous or {}
+    entries = {}
+    for rel_path, stat in files:
+        if keeps_name(rel_path):
+            continue
+        entry = previous.get(rel_path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime_ns:
+            digest = hash_file(os.path.join(source_dir_path, rel_path))
+            entry = {"hash": digest, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+        entries[rel_path] = entry
+    return entries
+
+
+def fingerprint_files(source_dir_path, files=None, hashes=None):
+    # Maps each file under source_dir_path (or each (rel_path, stat) in
+    # files) to its content-hashed name, both relative to the directory.
+    # Files in UNHASHED_NAMES and UNHASHED_DIRS are left out. hashes is the
+    # result of hash_files, if the caller has it.
+    if files is None:
+        files = scan_files(source_dir_path)
+    if hashes is None:
+        hashes = hash_files(source_dir_path, files)
+    names = {}
+    for rel_path, _ in files:
+        if rel_path in hashes:
+            names[rel_path] = fingerprint_name(rel_path, hashes[rel_path]["hash"])
+    return names
+
+
+def asset_urls(names):
+    # The same mapping as site-absolute URL paths, which is what templates
+    # and markdown refer to assets by.
+    urls = {}
+    for rel_path, hashed_path in names.items():
+        urls["/" + rel_path.replace(os.sep, "/")] = "/" + hashed_path.replace(os.sep, "/")
+    return urls
+
+
+def write_asset_manifest(dest_dir_path, urls):
+    write_if_changed(os.path.join(dest_dir_path, ASSET_MANIFEST), json.dumps(urls, indent=1, sort_keys=True))
+    return ASSET_MANIFEST
@@ -1,48 +1,340 @@
+import asyncio
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from markdown_blocks import markdown_to_html_node
+import buildstats
+from discover import walk_files
+from markdown_blocks import markdown_to_html_chunks_and_title, markdown_to_html_stream
+from manifest import hash_bytes, hash_file
+from output import open_output, write_if_changed
+from rendercache import RenderCache
+from rendercontext import RenderContext
+from search import page_url
+from shards import in_shard
+from template import load_template
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for filename in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
-        else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+# Markdown files at least this large are rendered block by block straight
+# from disk instead of being read into memory whole.
+STREAM_THRESHOLD = 8 * 1024 * 1024
+
+# Build engines: "sync" renders in this process, or in a process pool when
+# jobs > 1; "asyncio" overlaps file reads and writes with rendering.
+ENGINES = ("sync", "asyncio")
+
+# Pages read ahead of, and written behind, the asyncio engine's renderer.
+PIPELINE_QUEUE_SIZE = 16
+PIPELINE_THREADS = 4
+
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    *,
+    manifest=None,
+    jobs=1,
+    cache=None,
+    engine="sync",
+    search=None,
+    minify=False,
+    assets=None,
+    links=None,
+    shard=None,
+):
+    # Everything after basepath is keyword-only, so options can be added or
+    # reordered without callers binding them to the wrong parameter.
+    pages = find_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        pages = [page for page in pages if in_shard(os.path.relpath(page[0], dir_path_content), shard)]
+    context = RenderContext(basepath, search is not None, minify, assets, links is not None)
+    digests = {}
+    if manifest is None:
+        pending = pages
+    else:
+        with buildstats.stage("manifest"):
+            with open(template_path, "rb") as f:
+                template_data = f.read()
+            # Every page embeds the template, so the assets it links to are
+            # inputs of all pages; other assets only of the pages that
+            # mention them.
+            options = f"{context.cache_key()};assets={context.assets_key(template_data.decode())}"
+            manifest.set_inputs(hash_bytes(template_data), basepath, options)
+            # The asset keys recorded with each page hold as long as the
+            # asset map is the one they were computed against.
+            assets_unchanged = manifest.asset_map == context.assets_digest
+            manifest.asset_map = context.assets_digest
+            pending = []
+            for from_path, dest_path, stat in pages:
+                # Files whose size and mtime match the manifest are not read.
+                digest = manifest.unchanged_hash(from_path, stat)
+                if digest is not None and assets_unchanged:
+                    assets_key = manifest.page_assets(from_path)
+                else:
+                    digest, assets_key = page_inputs(from_path, context)
+                if (
+                    manifest.is_fresh(from_path, digest, dest_path, dest_dir_path, assets_key)
+                    and (search is None or str(from_path) in search.pages)
+                    and (links is None or str(from_path) in links.pages)
+                ):
+                    manifest.record(from_path, digest, dest_path, dest_dir_path, stat, assets_key)
+                    continue
+                digests[from_path] = (digest, assets_key)
+                pending.append((from_path, dest_path, stat))
+
+    template = load_template(template_path, context)
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine: {engine}")
+    if engine == "asyncio":
+        results = generate_pages_pipelined(pending, template_path, template, cache)
+    elif jobs > 1 and len(pending) > 1:
+        results = generate_pages_parallel(pending, template_path, template, jobs, cache)
+    else:
+        results = []
+        for from_path, dest_path, stat in pending:
+            print(f" * {from_path} {template_path} -> {dest_path}")
+            results.append(write_page(from_path, template, dest_path, cache, stat))
+
+    seen = set(from_path for from_path, _, _ in pages)
+    if manifest is not None:
+        for from_path, dest_path, stat in pending:
+            digest, assets_key = digests[from_path]
+            manifest.record(from_path, digest, dest_path, dest_dir_path, stat, assets_key)
+        for dest_path in manifest.remove_missing(seen, dest_dir_path):
+            print(f" - removed {dest_path}")
+
+    if search is not None:
+        with buildstats.stage("search"):
+            for (from_path, dest_path, _), (title, words, _) in zip(pending, results):
+                search.update(from_path, page_url(dest_path, dest_dir_path, basepath), title, words)
+            search.retain(seen)
+            # A shard only knows its own pages; the index is written when the
+            # shards are merged.
+            if shard is None:
+                search.write(dest_dir_path)
+
+    if links is not None:
+        for (from_path, dest_path, _), (_, _, page_links) in zip(pending, results):
+            links.update(from_path, os.path.relpath(dest_path, dest_dir_path), page_links)
+        links.retain(seen)
+
+
+def page_inputs(from_path, context):
+    # The source hash and asset key of a page, read in one go.
+    if not context.assets:
+        return hash_file(from_path), ""
+    with open(from_path, "rb") as f:
+        data = f.read()
+    return hash_bytes(data), context.assets_key(data.decode())
+
+
+def generate_pages_parallel(pages, template_path, template, jobs, cache=None):
+    # Pages are rendered in worker processes, but results are consumed in
+    # discovery order so the log and the reported error match a serial build.
+    chunksize = max(1, len(pages) // (jobs * 4))
+    errors = []
+    stats = buildstats.current
+    # Workers load their own copy of the render cache from disk and send back
+    # what they added or used, so the parent's copy is the one saved.
+    cache_args = None if cache is None else (cache.path, cache.max_bytes)
+    initargs = (template, stats is not None, cache_args)
+    page_results = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+        results = executor.map(_generate_page_job, pages, chunksize=chunksize)
+        for (from_path, dest_path, _), (error, page_stats, cache_updates, page_result) in zip(pages, results):
+            print(f" * {from_path} {template_path} -> {dest_path}")
+            if page_stats is not None:
+                stats.merge(page_stats)
+            if cache_updates is not None:
+                cache.apply_updates(cache_updates)
+            if error is not None:
+                print(f" ! {from_path}: {error}")
+                errors.append(error)
+            page_results.append(page_result)
+    if errors:
+        raise errors[0]
+    return page_results
+
+
+_worker_template = None
+_worker_profile = False
+_worker_cache = None
+
+
+def _init_worker(template, profile, cache_args):
+    global _worker_template, _worker_profile, _worker_cache
+    _worker_template = template
+    _worker_profile = profile
+    if cache_args is not None:
+        _worker_cache = RenderCache(*cache_args, track_updates=True)
+        _worker_cache.load()
+
+
+def _generate_page_job(page):
+    from_path, dest_path, stat = page
+    stats = buildstats.enable() if _worker_profile else None
+    error = None
+    result = None
+    try:
+        result = write_page(from_path, _worker_template, dest_path, _worker_cache, stat)
+    except Exception as e:
+        error = e
+    cache_updates = None if _worker_cache is None else _worker_cache.take_updates()
+    return error, stats, cache_updates, result
+
+
+def generate_pages_pipelined(pages, template_path, template, cache=None):
+    return asyncio.run(run_pipeline(pages, template_path, template, cache))
+
+
+async def run_pipeline(pages, template_path, template, cache=None):
+    # Three stages joined by bounded queues: markdown is read ahead on a
+    # thread pool, rendered one page at a time on the event loop (rendering
+    # holds the GIL, so more threads would not help), and written behind on
+    # the same pool. Pages are rendered and logged in discovery order, and the
+    # first error stops the build as it would a serial one.
+    loop = asyncio.get_running_loop()
+    reads = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    writes = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    results = []
+    with ThreadPoolExecutor(max_workers=PIPELINE_THREADS) as executor:
+        tasks = [
+            asyncio.create_task(read_stage(loop, executor, pages, reads)),
+            asyncio.create_task(render_stage(loop, executor, template_path, template, cache, reads, writes, results)),
+            asyncio.create_task(write_stage(writes)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    return results
+
+
+async def read_stage(loop, executor, pages, reads):
+    for from_path, dest_path, stat in pages:
+        read = loop.run_in_executor(executor, read_markdown, from_path, stat.st_size)
+        await reads.put((from_path, dest_path, stat, read))
+    await reads.put(None)
+
+
+async def render_stage(loop, executor, template_path, template, cache, reads, writes, results):
+    while True:
+        item = await reads.get()
+        if item is None:
+            break
+        from_path, dest_path, stat, read = item
+        markdown_content, seconds = await read
+        print(f" * {from_path} {template_path} -> {dest_path}")
+        if markdown_content is None:
+            # Too large to hold in memory; stream it as a serial build would.
+            results.append(write_page(from_path, template, dest_path, cache, stat))
+            continue
+        with buildstats.page(str(from_path)):
+            buildstats.record("read", seconds)
+            words, links = template.context.begin_page()
+            values = render_markdown(markdown_content, template, cache)
+            results.append((values["Title"], words, links))
+            with buildstats.stage("serialize"):
+                html = template.render(values)
+        write = loop.run_in_executor(executor, write_html, dest_path, html)
+        await writes.put((from_path, write))
+    await writes.put(None)
+
+
+async def write_stage(writes):
+    while True:
+        item = await writes.get()
+        if item is None:
+            break
+        from_path, write = item
+        seconds = await write
+        with buildstats.page(str(from_path)):
+            buildstats.record("write", seconds)
+
+
+# The two functions below run on pool threads, so they time themselves and
+# leave recording to the event loop; BuildStats is not thread-safe.
+def read_markdown(from_path, size):
+    start = time.perf_counter()
+    if size >= STREAM_THRESHOLD:
+        return None, 0.0
+    with open(from_path, "r") as from_file:
+        markdown_content = from_file.read()
+    return markdown_content, time.perf_counter() - start
+
+
+def write_html(dest_path, html):
+    start = time.perf_counter()
+    write_if_changed(dest_path, html)
+    return time.perf_counter() - start
+
+
+def find_pages(dir_path_content, dest_dir_path):
+    # (from_path, dest_path, stat) for every page, in the order a recursive
+    # walk over sorted directory listings would find them.
+    pages = []
+    for rel_path, stat in walk_files(dir_path_content):
+        dest_path = Path(os.path.join(dest_dir_path, rel_path)).with_suffix(".html")
+        pages.append((os.path.join(dir_path_content, rel_path), dest_path, stat))
+    return pages
 
 
 def generate_page(from_path, template_path, dest_path, basepath):
     print(f" * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
+    write_page(from_path, load_template(template_path, RenderContext(basepath)), dest_path)
+
+
+def write_page(from_path, template, dest_path, cache=None, stat=None):
+    # Returns the page title and, when the render context collects them, its
+    # words and link URLs. stat is the source's stat result from discovery,
+    # if the caller has it.
+    with buildstats.page(str(from_path)):
+        words, links = template.context.begin_page()
+        size = stat.st_size if stat is not None else os.path.getsize(from_path)
+        if size >= STREAM_THRESHOLD:
+            with buildstats.stage("read"):
+                with open(from_path, "r") as from_file:
+                    title = find_title(from_file)
+            values = {"Title": title, "Content": stream_content(from_path, template.context, cache)}
+        else:
+            with buildstats.stage("read"):
+                from_file = open(from_path, "r")
+                markdown_content = from_file.read()
+                from_file.close()
+
+            values = render_markdown(markdown_content, template, cache)
+
+        with buildstats.stage("write"):
+            with open_output(dest_path) as to_file:
+                with buildstats.stage("serialize"):
+                    template.write(to_file, values)
+    return values["Title"], words, links
 
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
+def render_markdown(markdown_content, template, cache=None):
+    chunks, title = markdown_to_html_chunks_and_title(markdown_content, cache, template.context)
+    if title is None:
+        raise ValueError("no title found")
+    return {"Title": title, "Content": chunks}
 
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', 'href="' + basepath)
-    template = template.replace('src="/', 'src="' + basepath)
 
-    dest_dir_path = os.path.dirname(dest_path)
-    if dest_dir_path != "":
-        os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
+def stream_content(from_path, context=None, cache=None):
+    with open(from_path, "r") as from_file:
+        yield from markdown_to_html_stream(from_file, cache, context)
 
 
 def extract_title(md):
-    lines = md.split("\n")
+    return find_title(md.split("\n"))
+
+
+def find_title(lines):
     for line in lines:
         if line.startswith("# "):
+            if line.endswith("\n"):
+                line = line[:-1]
             return line[2:]
     raise ValueError("no title found")
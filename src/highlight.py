@@ -0,0 +1,112 @@
+import html
+import re
+
+
+def keywords(*words):
+    return r"\b(?:" + "|".join(words) + r")\b"
+
+
+def lexer(*rules):
+    # One regex per language, one named group per token class. Class names
+    # are Pygments' short ones, so its stylesheets work unchanged.
+    return re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in rules), re.M)
+
+
+PYTHON = lexer(
+    ("c", r"#[^\n]*"),
+    ("s", r"(?:[rRbBuUfF]{1,2})?(?:\"\"\"[\s\S]*?\"\"\"|'''[\s\S]*?'''|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*')"),
+    ("k", keywords(
+        "and", "as", "assert", "async", "await", "break", "class", "continue", "def", "del", "elif", "else",
+        "except", "finally", "for", "from", "global", "if", "import", "in", "is", "lambda", "nonlocal", "not",
+        "or", "pass", "raise", "return", "try", "while", "with", "yield", "None", "True", "False",
+    )),
+    ("nb", keywords(
+        "print", "len", "range", "open", "str", "int", "float", "list", "dict", "set", "tuple", "isinstance",
+        "enumerate", "zip", "map", "filter", "sorted", "sum", "min", "max", "super", "self",
+    )),
+    ("m", r"\b\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?j?\b"),
+)
+
+JAVASCRIPT = lexer(
+    ("c", r"//[^\n]*|/\*[\s\S]*?\*/"),
+    ("s", r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`"),
+    ("k", keywords(
+        "async", "await", "break", "case", "catch", "class", "const", "continue", "default", "delete", "do",
+        "else", "export", "extends", "finally", "for", "function", "if", "import", "in", "instanceof", "let",
+        "new", "of", "return", "switch", "this", "throw", "try", "typeof", "var", "void", "while", "yield",
+        "null", "undefined", "true", "false",
+    )),
+    ("m", r"\b\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?\b"),
+)
+
+BASH = lexer(
+    ("c", r"(?<![^\s;])#[^\n]*"),
+    ("s", r"\"(?:\\.|[^\"\\])*\"|'[^']*'"),
+    ("k", keywords(
+        "if", "then", "else", "elif", "fi", "for", "while", "until", "do", "done", "case", "esac", "in",
+        "function", "return", "export", "local",
+    )),
+    ("nv", r"\$(?:\{[^}\n]*\}|\w+|[@*#?$!0-9])"),
+)
+
+JSON = lexer(
+    ("s", r"\"(?:\\.|[^\"\\\n])*\""),
+    ("k", keywords("true", "false", "null")),
+    ("m", r"-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"),
+)
+
+CSS = lexer(
+    ("c", r"/\*[\s\S]*?\*/"),
+    ("s", r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'"),
+    ("k", r"@[\w-]+|!important"),
+    ("m", r"#[0-9a-fA-F]{3,8}\b|-?\b\d+(?:\.\d+)?(?:%|[a-z]+)?"),
+)
+
+LEXERS = {
+    "python": PYTHON,
+    "py": PYTHON,
+    "javascript": JAVASCRIPT,
+    "js": JAVASCRIPT,
+    "typescript": JAVASCRIPT,
+    "ts": JAVASCRIPT,
+    "bash": BASH,
+    "sh": BASH,
+    "shell": BASH,
+    "json": JSON,
+    "css": CSS,
+}
+
+
+def highlight(language, code):
+    # Escaped HTML for code, with a <span class="..."> around each token the
+    # language's lexer knows. Languages without a lexer are only escaped.
+    pattern = LEXERS.get(language.lower())
+    if pattern is None:
+        return html.escape(code, quote=False)
+    chunks = []
+    position = 0
+    for match in pattern.finditer(code):
+        if match.start() == match.end():
+            continue
+        chunks.append(html.escape(code[position:match.start()], quote=False))
+        chunks.append(f'<span class="{match.lastgroup}">{html.escape(match.group(), quote=False)}</span>')
+        position = match.end()
+    chunks.append(html.escape(code[position:], quote=False))
+    return "".join(chunks)
+
+
+def language_class(language):
+    return "language-" + html.escape(language)
+
+
+def highlight_code(language, code, cache=None):
+    # Memoized by (language, hash of code) in a RenderCache, so a snippet
+    # repeated across pages is highlighted once, and kept across builds.
+    if cache is None:
+        return highlight(language, code)
+    key = cache.key("highlight:" + language, code)
+    result = cache.get(key)
+    if result is None:
+        result = highlight(language, code)
+        cache.put(key, result)
+    return result
@@ -1,4 +1,8 @@
 class HTMLNode():
+    # Nodes are created by the million on large builds, so they carry no
+    # per-instance __dict__.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -7,6 +11,11 @@ class HTMLNode():
 
     def to_html(self):
         raise NotImplementedError()
+
+    def write_html(self, writer):
+        # Streams the same markup as to_html() into writer, which can be any
+        # object with a write() method (a file, io.StringIO, a socket file...).
+        write_tree(self, writer.write)
     
     def props_to_html(self):
         return_str = ""
@@ -20,6 +29,8 @@ class HTMLNode():
         return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -44,6 +55,8 @@ class LeafNode(HTMLNode):
         return self.tag == other.tag and self.value == other.value and self.props == other.props
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
@@ -54,13 +67,39 @@ class ParentNode(HTMLNode):
         if not self.children:
             raise ValueError("children is required")
 
-        children_html = list(map(lambda x: x.to_html(), self.children))
-
-        result = f"<{self.tag}{self.props_to_html()}>{''.join(children_html)}</{self.tag}>"
-        return result
+        parts = []
+        write_tree(self, parts.append)
+        return "".join(parts)
     
     def __repr__(self):
         return f"ParentNode(tag={self.tag}, children={self.children}, props={self.props})"
     
     def __eq__(self, other):
-        return self.tag == other.tag and self.children == other.children and self.props == other.props 
\ No newline at end of file
+        return self.tag == other.tag and self.children == other.children and self.props == other.props
+
+
+# Shared closing-tag strings, so serializing does not format one per node.
+CLOSING_TAGS = {}
+
+
+def write_tree(root, write):
+    # Walks the tree with an explicit stack instead of recursing, so deep
+    # documents neither hit the recursion limit nor build a string per level.
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            write(node)
+        elif isinstance(node, ParentNode):
+            if not node.tag:
+                raise ValueError("tag is required")
+            if not node.children:
+                raise ValueError("children is required")
+            write(f"<{node.tag}{node.props_to_html()}>")
+            closing_tag = CLOSING_TAGS.get(node.tag)
+            if closing_tag is None:
+                closing_tag = CLOSING_TAGS.setdefault(node.tag, f"</{node.tag}>")
+            stack.append(closing_tag)
+            stack.extend(reversed(node.children))
+        else:
+            write(node.to_html())
@@ -3,16 +3,120 @@ import re
 from textnode import TextNode, TextType
 
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+INLINE_MARKUP_PATTERN = re.compile(r"[`*_!\[]")
+EMPHASIS_TYPES = {"**": TextType.BOLD, "_": TextType.ITALIC}
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    # Single left-to-right scan producing the same nodes as running
+    # split_nodes_delimiter for "**", "_" and "`", then split_nodes_image and
+    # split_nodes_link, except that emphasis may also nest.
+    return scan_inline(text, 0, len(text), True)
+
+
+def scan_inline(text, start, end, strict):
+    nodes = []
+    plain_start = start
+    position = start
+    while True:
+        match = INLINE_MARKUP_PATTERN.search(text, position, end)
+        if match is None:
+            break
+        i = match.start()
+        char = text[i]
+        position = i + 1
+
+        if char == "`":
+            close = text.find("`", i + 1, end)
+            if close == -1:
+                if strict:
+                    raise ValueError("invalid markdown, formatted section not closed")
+                continue
+            if close == i + 1 and not strict:
+                position = close + 1
+                continue
+            append_plain_text(nodes, text, plain_start, i)
+            if close > i + 1:
+                nodes.append(TextNode(text[i + 1 : close], TextType.CODE))
+            position = plain_start = close + 1
+            continue
+
+        if char == "!" or char == "[":
+            if char == "!":
+                pattern = IMAGE_PATTERN
+                text_type = TextType.IMAGE
+            elif i > 0 and text[i - 1] == "!":
+                continue
+            else:
+                pattern = LINK_PATTERN
+                text_type = TextType.LINK
+            found = pattern.match(text, i, end)
+            if found is None:
+                continue
+            append_plain_text(nodes, text, plain_start, i)
+            nodes.append(TextNode(found.group(1), text_type, found.group(2)))
+            position = plain_start = found.end()
+            continue
+
+        if char == "*":
+            if not text.startswith("**", i, end):
+                continue
+            delimiter = "**"
+        else:
+            delimiter = "_"
+        inner_start = i + len(delimiter)
+        close = find_closing_delimiter(text, delimiter, inner_start, end)
+        if close == -1:
+            if strict:
+                raise ValueError("invalid markdown, formatted section not closed")
+            position = inner_start
+            continue
+        if close == inner_start and not strict:
+            position = close + len(delimiter)
+            continue
+        append_plain_text(nodes, text, plain_start, i)
+        if close > inner_start:
+            nodes.append(emphasis_node(text, inner_start, close, EMPHASIS_TYPES[delimiter]))
+        position = plain_start = close + len(delimiter)
+
+    append_plain_text(nodes, text, plain_start, end)
     return nodes
 
 
+def append_plain_text(nodes, text, start, end):
+    if end > start:
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
+
+
+def find_closing_delimiter(text, delimiter, start, end):
+    # Delimiters inside a code span do not close the emphasis around it,
+    # unless there is no other candidate.
+    position = start
+    while True:
+        close = text.find(delimiter, position, end)
+        if close == -1:
+            return text.find(delimiter, start, end)
+        tick = text.find("`", position, close)
+        if tick == -1:
+            return close
+        tick_close = text.find("`", tick + 1, end)
+        if tick_close == -1:
+            return close
+        position = tick_close + 1
+
+
+def emphasis_node(text, start, end, text_type):
+    # The split-based parser never looked inside emphasis, so unclosed or
+    # empty markup nested in it stays literal rather than raising.
+    children = scan_inline(text, start, end, False)
+    if len(children) == 1 and children[0].text_type == TextType.TEXT:
+        return TextNode(children[0].text, text_type)
+    plain_text = "".join(child.text for child in children)
+    return TextNode(plain_text, text_type, None, children)
+
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for old_node in old_nodes:
@@ -0,0 +1,73 @@
+import os
+import posixpath
+import re
+
+from output import load_state, save_state
+from rendercontext import split_url
+
+
+LINKS_FORMAT_VERSION = 1
+EXTERNAL_PATTERN = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//)")
+
+
+def link_target(url, page_path):
+    # The output path (relative to the output root, "/"-separated) that a
+    # link on the page at page_path points at, or None for links that are
+    # not checked: external ones and bare fragments.
+    path, _ = split_url(url)
+    if path == "" or EXTERNAL_PATTERN.match(path):
+        return None
+    if path.startswith("/"):
+        target = path[1:]
+    else:
+        target = posixpath.join(posixpath.dirname(page_path), path)
+    target = posixpath.normpath(target) if target else ""
+    return "" if target == "." else target
+
+
+def target_exists(target, outputs):
+    # A link to a directory or an extensionless path is served by its
+    # index.html or by the .html page of that name.
+    if target == "":
+        return "index.html" in outputs
+    return target in outputs or f"{target}/index.html" in outputs or f"{target}.html" in outputs
+
+
+class LinkIndex():
+    # The link and image URLs of every page, checked after a build against
+    # the set of output paths: one set lookup per link, no crawling. URLs are
+    # kept in path between builds, so an incremental build only collects them
+    # again for the pages it re-renders.
+    def __init__(self, path=None):
+        self.path = path
+        self.pages = {}
+
+    def update(self, from_path, page_path, links):
+        self.pages[str(from_path)] = {"page": page_path.replace(os.sep, "/"), "links": links}
+
+    def retain(self, seen):
+        seen = set(str(from_path) for from_path in seen)
+        for from_path in list(self.pages):
+            if from_path not in seen:
+                del self.pages[from_path]
+
+    def broken(self, outputs):
+        # (from_path, url) for every link whose target is not in outputs.
+        outputs = set(output.replace(os.sep, "/") for output in outputs)
+        broken = []
+        for from_path in sorted(self.pages):
+            page = self.pages[from_path]
+            for url in page["links"]:
+                target = link_target(url, page["page"])
+                if target is not None and not target_exists(target, outputs):
+                    broken.append((from_path, url))
+        return broken
+
+    def load(self):
+        data = load_state(self.path, LINKS_FORMAT_VERSION)
+        if data is None:
+            return
+        self.pages = data["pages"]
+
+    def save(self):
+        save_state(self.path, LINKS_FORMAT_VERSION, {"pages": self.pages})
@@ -1,32 +1,348 @@
+import argparse
 import os
-import shutil
-import sys
+import time
 
-from copystatic import copy_files_recursive
-from gencontent import generate_pages_recursive
+import buildstats
+
+from copystatic import scan_files, sync_files
+from fingerprint import ASSET_MANIFEST, asset_urls, fingerprint_files, hash_files, write_asset_manifest
+from links import LinkIndex
+from gencontent import ENGINES, generate_pages_recursive
+from manifest import Manifest
+from output import begin_publish, finish_publish, prune_outputs
+from precompress import compress_outputs
+from rendercache import RenderCache
+from search import SearchIndex
+from shards import (
+    in_shard,
+    load_shards,
+    merge_shards,
+    parse_shard,
+    shard_dir_path,
+    shard_state_path,
+    write_shard_manifest,
+)
 
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
+manifest_path = "./.buildcache/manifest.json"
+profile_path = "./.buildcache/profile.json"
+cache_path = "./.buildcache/blocks.json"
+search_path = "./.buildcache/search.json"
+links_path = "./.buildcache/links.json"
 default_basepath = "/"
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the static site.")
+    parser.add_argument("basepath", nargs="?", default=default_basepath)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep the existing output and only regenerate pages whose inputs changed",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages (0 uses every CPU core)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="sync",
+        help="how pages are built: sync renders pages one after another (or in -j processes), "
+        "asyncio overlaps reading and writing files with rendering in a single process",
+    )
+    parser.add_argument(
+        "--link-static",
+        action="store_true",
+        help="hard link static files into the output instead of copying them where the filesystem allows",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each build stage, print a summary and write a JSON trace",
+    )
+    parser.add_argument("--profile-output", default=profile_path, help="where --profile writes its trace")
+    parser.add_argument("--no-cache", action="store_true", help="render every block instead of reusing cached fragments")
+    parser.add_argument("--cache-size", type=int, default=64, help="size cap of the block render cache in MB")
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="write a sharded search index of every page's words to search/ in the output",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="report links and images in the content that point at no generated page or static file",
+    )
+    parser.add_argument(
+        "--strict-links",
+        action="store_true",
+        help="like --check-links, but fail the build (before publishing) if any are broken",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip formatting whitespace and comments from the template and collapse whitespace in text",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="copy static files to content-hashed names and point the template and content at them",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="write a .gz copy next to every HTML, CSS and text output that compresses",
+    )
+    parser.add_argument(
+        "--in-place",
+        action="store_true",
+        help="update the output directory directly instead of staging the build and swapping it in",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_arg,
+        metavar="K/N",
+        help=f"build only the K-th of N deterministic slices of the pages and static files, "
+        f"into {dir_path_public}.shards/K-of-N",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        nargs="+",
+        metavar="SHARD_DIR",
+        help="combine the output of shard builds 1 to N into the output directory instead of building",
+    )
+    args = parser.parse_args()
+    if args.engine == "asyncio" and args.jobs != 1:
+        parser.error("--engine asyncio renders in a single process and cannot be combined with -j")
+    if args.shard is not None and args.merge_shards:
+        parser.error("--shard and --merge-shards cannot be combined")
+    return args
+
+
+def shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 def main():
-    basepath = default_basepath
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+    args = parse_args()
+    if args.merge_shards:
+        merge(args)
+        return
+    basepath = args.basepath
+    jobs = args.jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    if args.profile:
+        buildstats.enable()
+
+    # A shard builds into its own tree, with its own build state, so shards
+    # can be built side by side or on different machines and merged later.
+    shard = args.shard
+    public_path = dir_path_public
+    if shard is not None:
+        public_path = shard_dir_path(dir_path_public, shard)
+
+    manifest = Manifest(shard_state_path(manifest_path, shard))
+    if args.incremental:
+        manifest.load()
+    previous_compressed = manifest.compressed
+    manifest.compressed = {}
+    previous_fingerprints = manifest.fingerprints
+    manifest.fingerprints = {}
 
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
+    # Unchanged files are never rewritten, so their mtimes survive the build.
+    # Unless --in-place is given, the build goes to a staging copy of the
+    # current output that is swapped in once it is complete.
+    build_dir_path = public_path
+    if not args.in_place:
+        with buildstats.stage("publish"):
+            build_dir_path = begin_publish(public_path)
 
     print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
+    with buildstats.stage("static"):
+        static_files = scan_files(dir_path_static)
+        names = None
+        assets = None
+        if args.fingerprint:
+            # Every shard needs the full asset map to rewrite URLs.
+            manifest.fingerprints = hash_files(dir_path_static, static_files, previous_fingerprints)
+            names = fingerprint_files(dir_path_static, static_files, manifest.fingerprints)
+            assets = asset_urls(names)
+        static_files = [(rel_path, stat) for rel_path, stat in static_files if in_shard(rel_path, shard)]
+        # The asset manifest is not a static file; left out of the previous
+        # sync's files, it is rewritten in place rather than deleted first.
+        previous_assets = [rel_path for rel_path in manifest.assets if rel_path != ASSET_MANIFEST]
+        manifest.assets = sync_files(
+            dir_path_static, build_dir_path, previous_assets, link=args.link_static, names=names, files=static_files
+        )
+        if assets is not None and (shard is None or shard[0] == 1):
+            manifest.assets.append(write_asset_manifest(build_dir_path, assets))
+
+    cache = None
+    if not args.no_cache:
+        cache = RenderCache(shard_state_path(cache_path, shard), args.cache_size * 1024 * 1024)
+        cache.load()
+
+    search = None
+    if args.search:
+        search = SearchIndex(shard_state_path(search_path, shard))
+        if args.incremental:
+            search.load()
+
+    links = None
+    if args.check_links or args.strict_links:
+        links = LinkIndex(shard_state_path(links_path, shard))
+        if args.incremental:
+            links.load()
 
     print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath)
+    generate_pages_recursive(
+        dir_path_content,
+        template_path,
+        build_dir_path,
+        basepath,
+        manifest=manifest,
+        jobs=jobs,
+        cache=cache,
+        engine=args.engine,
+        search=search,
+        minify=args.minify,
+        assets=assets,
+        links=links,
+        shard=shard,
+    )
+    outputs = manifest.outputs()
+    if search is not None:
+        outputs |= search.outputs()
+
+    # Links are checked when the shards are merged.
+    if links is not None and shard is None:
+        check_links(links, outputs | set(names or ()), args.strict_links)
+
+    if args.gzip:
+        print("Compressing output...")
+        with buildstats.stage("compress"):
+            manifest.compressed = compress_outputs(build_dir_path, outputs, previous_compressed)
+        outputs |= manifest.outputs()
+
+    if shard is not None:
+        inputs = {
+            "template": manifest.template,
+            "basepath": manifest.basepath,
+            "options": manifest.options,
+            # options only covers the assets the template mentions.
+            "asset_map": manifest.asset_map,
+            "gzip": args.gzip,
+            "search": search is not None,
+            "links": links is not None,
+        }
+        outputs.add(write_shard_manifest(
+            build_dir_path,
+            shard,
+            inputs,
+            outputs,
+            [rel_path for rel_path, _ in static_files],
+            None if search is None else search.pages,
+            None if links is None else links.pages,
+        ))
+
+    with buildstats.stage("write"):
+        for path in prune_outputs(build_dir_path, outputs):
+            print(f" - removed {path}")
+    if not args.in_place:
+        print("Publishing public directory...")
+        with buildstats.stage("publish"):
+            finish_publish(build_dir_path, public_path)
+    manifest.save()
+    if cache is not None:
+        cache.save()
+    if search is not None:
+        search.save()
+    if links is not None:
+        links.save()
+
+    if args.profile:
+        wall_seconds = time.perf_counter() - start
+        print()
+        print(buildstats.current.summary(wall_seconds))
+        buildstats.current.write_trace(args.profile_output, wall_seconds)
+        print(f"Trace written to {args.profile_output}")
+
+
+def check_links(links, outputs, strict):
+    print("Checking links...")
+    with buildstats.stage("links"):
+        # Content links to static files by their source names.
+        broken = links.broken(outputs)
+    for from_path, url in broken:
+        print(f" ! {from_path}: broken link {url}")
+    if broken and strict:
+        raise SystemExit(f"{len(broken)} broken links, not publishing")
+
+
+def merge(args):
+    # Combines shard trees into the output directory. The search index and
+    # link check need every page, so they are finished here from the data
+    # each shard recorded.
+    try:
+        shards = load_shards(args.merge_shards)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    inputs = shards[0]["inputs"]
+
+    build_dir_path = dir_path_public
+    if not args.in_place:
+        build_dir_path = begin_publish(dir_path_public)
+
+    print("Merging shards...")
+    try:
+        outputs = merge_shards(shards, build_dir_path)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    if inputs["search"]:
+        # Page ids are the merged tree's own, kept in the same state file as
+        # a full build's, so --incremental merges keep them stable too.
+        search = SearchIndex(search_path)
+        if args.incremental:
+            search.load()
+        for data in shards:
+            for from_path, page in data["search"].items():
+                search.update(from_path, page["url"], page["title"], page["words"])
+        search.retain(from_path for data in shards for from_path in data["search"])
+        search.write(build_dir_path)
+        outputs |= search.outputs()
+        if inputs["gzip"]:
+            compressed = compress_outputs(build_dir_path, search.outputs())
+            outputs |= set(rel_path + ".gz" for rel_path, entry in compressed.items() if entry["gzip"])
+
+    if inputs["links"]:
+        links = LinkIndex()
+        sources = set()
+        for data in shards:
+            links.pages.update(data["links"])
+            sources.update(data["sources"])
+        check_links(links, outputs | sources, args.strict_links)
+
+    if inputs["search"]:
+        search.save()
+
+    for path in prune_outputs(build_dir_path, outputs):
+        print(f" - removed {path}")
+    if not args.in_place:
+        print("Publishing public directory...")
+        finish_publish(build_dir_path, dir_path_public)
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import hashlib
+import os
+
+from output import load_state, prune_empty_dirs, save_state
+
+
+MANIFEST_VERSION = 6
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest():
+    # Records the input hashes each generated page was built from, so an
+    # incremental build can skip pages whose inputs have not changed, and the
+    # static files copied by the last sync, so removed ones can be cleaned up,
+    # and the outputs that got gzip sidecars. With fingerprinting on, it also
+    # keeps the hash of each static file and of the asset map.
+    def __init__(self, path):
+        self.path = path
+        self.template = None
+        self.basepath = None
+        self.options = None
+        self.pages = {}
+        self.assets = []
+        self.compressed = {}
+        self.fingerprints = {}
+        self.asset_map = ""
+
+    def load(self):
+        data = load_state(self.path, MANIFEST_VERSION)
+        if data is None:
+            return
+        self.template = data["template"]
+        self.basepath = data["basepath"]
+        self.options = data["options"]
+        self.pages = data["pages"]
+        self.assets = data["assets"]
+        self.compressed = data["compressed"]
+        self.fingerprints = data["fingerprints"]
+        self.asset_map = data["asset_map"]
+
+    def save(self):
+        data = {
+            "template": self.template,
+            "basepath": self.basepath,
+            "options": self.options,
+            "pages": self.pages,
+            "assets": self.assets,
+            "compressed": self.compressed,
+            "fingerprints": self.fingerprints,
+            "asset_map": self.asset_map,
+        }
+        save_state(self.path, MANIFEST_VERSION, data, indent=1, sort_keys=True)
+
+    def set_inputs(self, template_hash, basepath, options=""):
+        # The template, basepath and render options feed every page, so a
+        # change to any of them invalidates all of them.
+        if self.template != template_hash or self.basepath != basepath or self.options != options:
+            self.pages = {}
+        self.template = template_hash
+        self.basepath = basepath
+        self.options = options
+
+    # Output paths are stored relative to the output root, so the manifest
+    # stays valid whichever directory a build is staged in.
+    # assets is the page's RenderContext.assets_key.
+    def is_fresh(self, from_path, digest, dest_path, dest_root, assets=""):
+        entry = self.pages.get(from_path)
+        if entry is None:
+            return False
+        if entry["hash"] != digest or entry["dest"] != os.path.relpath(dest_path, dest_root):
+            return False
+        if entry.get("assets", "") != assets:
+            return False
+        return os.path.exists(dest_path)
+
+    def record(self, from_path, digest, dest_path, dest_root, stat=None, assets=""):
+        entry = {"hash": digest, "dest": os.path.relpath(dest_path, dest_root)}
+        if assets:
+            entry["assets"] = assets
+        if stat is not None:
+            entry["size"] = stat.st_size
+            entry["mtime"] = stat.st_mtime_ns
+        self.pages[from_path] = entry
+
+    def unchanged_hash(self, from_path, stat):
+        # The recorded hash if the source's size and mtime are as recorded,
+        # so it need not be read and hashed again; otherwise None.
+        entry = self.pages.get(from_path)
+        if entry is None or entry.get("size") != stat.st_size or entry.get("mtime") != stat.st_mtime_ns:
+            return None
+        return entry["hash"]
+
+    def page_assets(self, from_path):
+        return self.pages[from_path].get("assets", "")
+
+    def remove_missing(self, seen, dest_root):
+        removed = []
+        for from_path in sorted(self.pages):
+            if from_path in seen:
+                continue
+            dest_path = os.path.join(dest_root, self.pages.pop(from_path)["dest"])
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+                prune_empty_dirs(os.path.dirname(dest_path), dest_root)
+            removed.append(dest_path)
+        return removed
+
+    def outputs(self):
+        # Every file the recorded build put in the output root.
+        outputs = set(entry["dest"] for entry in self.pages.values())
+        outputs.update(self.assets)
+        outputs.update(rel_path + ".gz" for rel_path, entry in self.compressed.items() if entry["gzip"])
+        return outputs
+
@@ -1,8 +1,13 @@
 from enum import Enum
 
-from htmlnode import ParentNode
+import buildstats
+from highlight import highlight_code, language_class
+from htmlnode import LeafNode, ParentNode
 from inline_markdown import text_to_textnodes
-from textnode import text_node_to_html_node, TextNode, TextType
+from textnode import text_node_to_html, text_node_to_html_node, TextNode, TextType
+
+
+HEADING_TAGS = {level: f"h{level}" for level in range(1, 7)}
 
 
 class BlockType(Enum):
@@ -25,76 +30,224 @@ def markdown_to_blocks(markdown):
     return filtered_blocks
 
 
+def iter_blocks(lines):
+    # Streaming counterpart of markdown_to_blocks: consumes an iterable of
+    # lines (such as an open file) and yields each block as soon as the blank
+    # line ending it is read, so only one block is held in memory. Blocks that
+    # are empty once stripped are skipped.
+    for _, block_lines in BlockScan(lines):
+        yield "\n".join(block_lines)
+
+
+class BlockScan():
+    # A single pass over a document's lines that yields (block_type, lines)
+    # for each block, classified as it completes, and records the page title
+    # (the first "# " line) along the way. The lines are those of the
+    # stripped block, ready for the *_lines_to_html_node functions.
+    def __init__(self, lines):
+        self.lines = lines
+        self.title = None
+
+    def __iter__(self):
+        block_lines = []
+        for line in self.lines:
+            if line.endswith("\n"):
+                line = line[:-1]
+            if line != "":
+                if self.title is None and line.startswith("# "):
+                    self.title = line[2:]
+                block_lines.append(line)
+                continue
+            if block_lines:
+                block_lines = strip_block_lines(block_lines)
+                if block_lines:
+                    yield block_lines_type(block_lines), block_lines
+                block_lines = []
+        if block_lines:
+            block_lines = strip_block_lines(block_lines)
+            if block_lines:
+                yield block_lines_type(block_lines), block_lines
+
+
+def strip_block_lines(lines):
+    # Line-wise equivalent of "\n".join(lines).strip().split("\n").
+    start = 0
+    end = len(lines)
+    while start < end and lines[start].isspace():
+        start += 1
+    while end > start and lines[end - 1].isspace():
+        end -= 1
+    if start == end:
+        return []
+    lines = lines[start:end]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return lines
+
+
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+ORDERED_LIST_PREFIXES = [f"{i}. " for i in range(100)]
+
+
 def block_to_block_type(block):
-    lines = block.split("\n")
+    return block_lines_type(block.split("\n"))
+
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+def block_lines_type(lines):
+    first = lines[0]
+    if first.startswith(HEADING_PREFIXES):
         return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+    if len(lines) > 1 and first.startswith("```") and lines[-1].startswith("```"):
         return BlockType.CODE
-    if block.startswith(">"):
+    if first.startswith(">"):
         for line in lines:
             if not line.startswith(">"):
                 return BlockType.PARAGRAPH
         return BlockType.QUOTE
-    if block.startswith("- "):
+    if first.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
                 return BlockType.PARAGRAPH
         return BlockType.ULIST
-    if block.startswith("1. "):
-        i = 1
-        for line in lines:
-            if not line.startswith(f"{i}. "):
+    if first.startswith("1. "):
+        for i, line in enumerate(lines, 1):
+            prefix = ORDERED_LIST_PREFIXES[i] if i < len(ORDERED_LIST_PREFIXES) else f"{i}. "
+            if not line.startswith(prefix):
                 return BlockType.PARAGRAPH
-            i += 1
         return BlockType.OLIST
     return BlockType.PARAGRAPH
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
-    return ParentNode("div", children, None)
+def markdown_to_html_node(markdown, cache=None, context=None):
+    node, _ = markdown_to_html_node_and_title(markdown, cache, context)
+    return node
+
+
+def markdown_to_html_node_and_title(markdown, cache=None, context=None):
+    # Returns the rendered tree and the page title (None if there is no "# "
+    # line) from one walk over the document.
+    scan = BlockScan(markdown.split("\n"))
+    with buildstats.stage("blocks"):
+        blocks = list(scan)
+    with buildstats.stage("parse"):
+        children = []
+        for block_type, lines in blocks:
+            html_node = render_block(block_type, lines, cache, context)
+            children.append(html_node)
+        return ParentNode("div", children, None), scan.title
+
+
+def markdown_to_html_chunks_and_title(markdown, cache=None, context=None):
+    # Tree-free counterpart of markdown_to_html_node_and_title: the document
+    # comes back as a generator of HTML strings, one per block, rendered as it
+    # is consumed and without building HTMLNode objects. The title is known
+    # up front.
+    scan = BlockScan(markdown.split("\n"))
+    with buildstats.stage("blocks"):
+        blocks = list(scan)
+    return blocks_to_html_chunks(blocks, cache, context), scan.title
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def blocks_to_html_chunks(blocks, cache=None, context=None):
+    if not blocks:
+        raise ValueError("children is required")
+    yield "<div>"
+    for block_type, lines in blocks:
+        with buildstats.stage("parse"):
+            html = render_block_html(block_type, lines, cache, context)
+        yield html
+    yield "</div>"
+
+
+def markdown_to_html_stream(lines, cache=None, context=None):
+    # Streaming counterpart of markdown_to_html_chunks_and_title: yields the
+    # HTML of one block at a time, without ever holding the whole document.
+    yield "<div>"
+    empty = True
+    for block_type, block_lines in BlockScan(lines):
+        empty = False
+        yield render_block_html(block_type, block_lines, cache, context)
+    if empty:
+        raise ValueError("children is required")
+    yield "</div>"
+
+
+def render_block(block_type, lines, cache=None, context=None):
+    if cache is None:
+        return block_lines_to_html_node(block_type, lines, context)
+    return LeafNode(None, render_block_html(block_type, lines, cache, context))
+
+
+def render_block_html(block_type, lines, cache=None, context=None):
+    # With a RenderCache, a block seen before (under the same RenderContext
+    # settings) costs one hash and one lookup and comes back as a pre-rendered
+    # fragment. Page data collected from text nodes (search words, links) is
+    # cached alongside, so a hit replays it without parsing the block.
+    if cache is None:
+        return block_lines_to_html(block_type, lines, context)
+    text = "\n".join(lines)
+    collected = [] if context is None else context.collected()
+    side_keys = [cache.key(name, text) for name, _ in collected]
+    side_values = [cache.get(side_key) for side_key in side_keys]
+    key = cache.key(f"{context.cache_key()};assets={context.assets_key(text)}" if context else "", text)
+    html = cache.get(key)
+    if html is not None and None not in side_values:
+        for (_, values), cached in zip(collected, side_values):
+            if cached:
+                values.extend(cached.split("\0"))
+        return html
+    starts = [len(values) for _, values in collected]
+    html = block_lines_to_html(block_type, lines, context, cache)
+    cache.put(key, html)
+    for side_key, (_, values), start in zip(side_keys, collected, starts):
+        cache.put(side_key, "\0".join(values[start:]))
+    return html
+
+
+def block_to_html_node(block, context=None):
+    lines = block.split("\n")
+    return block_lines_to_html_node(block_lines_type(lines), lines, context)
+
+
+def block_lines_to_html_node(block_type, lines, context=None, cache=None):
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return paragraph_lines_to_html_node(lines, context)
     if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
+        return heading_to_html_node("\n".join(lines), context)
     if block_type == BlockType.CODE:
-        return code_to_html_node(block)
+        return code_to_html_node("\n".join(lines), cache)
     if block_type == BlockType.OLIST:
-        return olist_to_html_node(block)
+        return olist_lines_to_html_node(lines, context)
     if block_type == BlockType.ULIST:
-        return ulist_to_html_node(block)
+        return ulist_lines_to_html_node(lines, context)
     if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return quote_lines_to_html_node(lines, context)
     raise ValueError("invalid block type")
 
 
-def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
-    children = []
-    for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
-        children.append(html_node)
-    return children
+def text_to_children(text, context=None):
+    with buildstats.stage("inline"):
+        text_nodes = text_to_textnodes(text)
+        if context is not None and context.collecting:
+            context.collect(text_nodes)
+        children = []
+        for text_node in text_nodes:
+            html_node = text_node_to_html_node(text_node, context)
+            children.append(html_node)
+        return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
+def paragraph_to_html_node(block, context=None):
+    return paragraph_lines_to_html_node(block.split("\n"), context)
+
+
+def paragraph_lines_to_html_node(lines, context=None):
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+    children = text_to_children(paragraph, context)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, context=None):
     level = 0
     for char in block:
         if char == "#":
@@ -104,13 +257,22 @@ def heading_to_html_node(block):
     if level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    children = text_to_children(text, context)
+    return ParentNode(HEADING_TAGS.get(level) or f"h{level}", children)
 
 
-def code_to_html_node(block):
+def code_to_html_node(block, cache=None):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
+    first_line, newline, _ = block.partition("\n")
+    info = first_line[3:].split()
+    if newline and info:
+        # A fence with a language tag gets escaped, highlighted code.
+        language = info[0]
+        code = block[len(first_line) + 1 : -3]
+        child = LeafNode(None, highlight_code(language, code, cache))
+        code = ParentNode("code", [child], {"class": language_class(language)})
+        return ParentNode("pre", [code])
     text = block[4:-3]
     raw_text_node = TextNode(text, TextType.TEXT)
     child = text_node_to_html_node(raw_text_node)
@@ -118,33 +280,106 @@ def code_to_html_node(block):
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+def olist_to_html_node(block, context=None):
+    return olist_lines_to_html_node(block.split("\n"), context)
+
+
+def olist_lines_to_html_node(items, context=None):
     html_items = []
     for item in items:
         text = item[3:]
-        children = text_to_children(text)
+        children = text_to_children(text, context)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(block, context=None):
+    return ulist_lines_to_html_node(block.split("\n"), context)
+
+
+def ulist_lines_to_html_node(items, context=None):
     html_items = []
     for item in items:
         text = item[2:]
-        children = text_to_children(text)
+        children = text_to_children(text, context)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def quote_to_html_node(block, context=None):
+    return quote_lines_to_html_node(block.split("\n"), context)
+
+
+def quote_lines_to_html_node(lines, context=None):
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
             raise ValueError("invalid quote block")
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    children = text_to_children(content)
+    children = text_to_children(content, context)
     return ParentNode("blockquote", children)
+
+
+# Tree-free rendering: the functions below produce exactly the markup of
+# their *_to_html_node counterparts' to_html(), as strings.
+
+
+def block_lines_to_html(block_type, lines, context=None, cache=None):
+    if block_type == BlockType.PARAGRAPH:
+        return text_to_html("p", " ".join(lines), context)
+    if block_type == BlockType.HEADING:
+        return heading_to_html("\n".join(lines), context)
+    if block_type == BlockType.CODE:
+        return code_to_html("\n".join(lines), cache)
+    if block_type == BlockType.OLIST:
+        return "<ol>" + "".join([text_to_html("li", item[3:], context) for item in lines]) + "</ol>"
+    if block_type == BlockType.ULIST:
+        return "<ul>" + "".join([text_to_html("li", item[2:], context) for item in lines]) + "</ul>"
+    if block_type == BlockType.QUOTE:
+        return quote_to_html(lines, context)
+    raise ValueError("invalid block type")
+
+
+def text_to_html(tag, text, context=None):
+    # <tag>, the inline markup of text, </tag>.
+    with buildstats.stage("inline"):
+        text_nodes = text_to_textnodes(text)
+        if not text_nodes:
+            raise ValueError("children is required")
+        if context is not None and context.collecting:
+            context.collect(text_nodes)
+        return f"<{tag}>" + "".join([text_node_to_html(text_node, context) for text_node in text_nodes]) + f"</{tag}>"
+
+
+def heading_to_html(block, context=None):
+    level = 0
+    for char in block:
+        if char == "#":
+            level += 1
+        else:
+            break
+    if level + 1 >= len(block):
+        raise ValueError(f"invalid heading level: {level}")
+    return text_to_html(HEADING_TAGS.get(level) or f"h{level}", block[level + 1 :], context)
+
+
+def code_to_html(block, cache=None):
+    if not block.startswith("```") or not block.endswith("```"):
+        raise ValueError("invalid code block")
+    first_line, newline, _ = block.partition("\n")
+    info = first_line[3:].split()
+    if newline and info:
+        language = info[0]
+        code = highlight_code(language, block[len(first_line) + 1 : -3], cache)
+        return f'<pre><code class="{language_class(language)}">{code}</code></pre>'
+    return f"<pre><code>{block[4:-3]}</code></pre>"
+
+
+def quote_to_html(lines, context=None):
+    new_lines = []
+    for line in lines:
+        if not line.startswith(">"):
+            raise ValueError("invalid quote block")
+        new_lines.append(line.lstrip(">").strip())
+    return text_to_html("blockquote", " ".join(new_lines), context)
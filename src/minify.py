@@ -0,0 +1,83 @@
+import re
+
+
+TAG_PATTERN = re.compile(r"(<!--.*?-->|<[^>]*>)", re.S)
+TAG_NAME_PATTERN = re.compile(r"</?(!?[a-zA-Z][a-zA-Z0-9]*)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Elements whose text is kept byte for byte.
+PRESERVE_TAGS = ("pre", "textarea", "script", "style")
+
+# Elements around which whitespace does not render.
+BLOCK_TAGS = frozenset((
+    "!doctype", "address", "article", "aside", "blockquote", "body", "dd", "details", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "head",
+    "header", "hr", "html", "li", "link", "main", "meta", "nav", "ol", "p", "pre", "section", "summary",
+    "table", "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul",
+))
+
+
+def collapse_whitespace(text):
+    return WHITESPACE_PATTERN.sub(" ", text)
+
+
+class HTMLMinifier():
+    # Conservative minifier for hand-written HTML such as the template:
+    # comments go, whitespace that only formats the source (it spans a line
+    # break and sits between two block-level tags) goes, and other
+    # whitespace runs collapse to one space, which is how browsers render
+    # them anyway. Nothing inside PRESERVE_TAGS is touched. The state carries
+    # over between calls, so a document can be minified in pieces; what lies
+    # between two pieces (a template slot) is not known, so whitespace at
+    # either edge of a piece is kept as one space.
+    def __init__(self):
+        self.preserve = None
+
+    def minify(self, html):
+        result = []
+        # Whitespace is held back until the token after it shows whether it
+        # separates two block-level tags.
+        pending = None
+        previous_block = False
+        for token in TAG_PATTERN.split(html):
+            if token == "":
+                continue
+            if self.preserve is None and token.startswith("<!--"):
+                continue
+            if self.preserve is None and token.isspace():
+                pending = "\n" if pending == "\n" or "\n" in token else " "
+                continue
+            is_block = token.startswith("<") and self.is_block(token)
+            if pending is not None and not (pending == "\n" and previous_block and is_block):
+                result.append(" ")
+            pending = None
+            previous_block = is_block
+            if token.startswith("<"):
+                self.track(token)
+                result.append(token)
+            elif self.preserve is not None:
+                result.append(token)
+            else:
+                result.append(collapse_whitespace(token))
+        if pending is not None:
+            result.append(" ")
+        return "".join(result)
+
+    def is_block(self, tag):
+        match = TAG_NAME_PATTERN.match(tag)
+        return match is not None and match.group(1).lower() in BLOCK_TAGS
+
+    def track(self, tag):
+        match = TAG_NAME_PATTERN.match(tag)
+        if match is None:
+            return
+        name = match.group(1).lower()
+        if self.preserve is None and not tag.startswith("</") and name in PRESERVE_TAGS:
+            self.preserve = name
+        elif self.preserve == name and tag.startswith("</"):
+            self.preserve = None
+
+
+def minify_html(html):
+    # Whitespace at the edges of a whole document never renders.
+    return HTMLMinifier().minify(html).strip()
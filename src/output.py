@@ -0,0 +1,163 @@
+import filecmp
+import itertools
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+
+_temp_names = itertools.count()
+
+
+@contextmanager
+def open_output(path, mode="w"):
+    # Writes go to a temporary file next to path, which only replaces path
+    # (atomically, via os.replace) if its contents differ. Unchanged files
+    # keep their inode and mtime, and readers never see a half-written file.
+    # Existing files are never modified in place, so a hard link into another
+    # tree is never written through. This is for streamed writes; data that
+    # is already in memory goes through write_if_changed.
+    dir_path = os.path.dirname(path)
+    if dir_path != "":
+        os.makedirs(dir_path, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}-{next(_temp_names)}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+        publish_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_if_changed(path, data):
+    # data is already in memory, so it is compared with the file on disk
+    # (sizes first) before anything is written: an unchanged file costs one
+    # read and no temporary file. Returns whether the file was written.
+    if isinstance(data, str):
+        data = data.encode()
+    if file_matches(path, data):
+        return False
+    with open_output(path, "wb") as f:
+        f.write(data)
+    return True
+
+
+def file_matches(path, data):
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+
+def publish_file(tmp_path, path):
+    try:
+        same = os.path.getsize(tmp_path) == os.path.getsize(path) and filecmp.cmp(tmp_path, path, shallow=False)
+    except FileNotFoundError:
+        same = False
+    if same:
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+def staging_path(dest_dir_path):
+    return dest_dir_path.rstrip("/\\") + ".next"
+
+
+def begin_publish(dest_dir_path):
+    # Returns a staging directory pre-populated with hard links to the current
+    # output, so the build can compare against (and keep) unchanged files
+    # while the live tree stays untouched until finish_publish.
+    staging_dir_path = staging_path(dest_dir_path)
+    if os.path.exists(staging_dir_path):
+        shutil.rmtree(staging_dir_path)
+    if os.path.exists(dest_dir_path):
+        shutil.copytree(dest_dir_path, staging_dir_path, copy_function=link_or_copy)
+    else:
+        os.makedirs(staging_dir_path)
+    return staging_dir_path
+
+
+def finish_publish(staging_dir_path, dest_dir_path):
+    # Swaps the staging tree in with two renames. The standard library has no
+    # atomic directory exchange, so the live path is missing only for the
+    # instant between them rather than for the whole build.
+    old_dir_path = dest_dir_path.rstrip("/\\") + ".old"
+    if os.path.exists(old_dir_path):
+        shutil.rmtree(old_dir_path)
+    if os.path.exists(dest_dir_path):
+        os.rename(dest_dir_path, old_dir_path)
+    os.rename(staging_dir_path, dest_dir_path)
+    if os.path.exists(old_dir_path):
+        shutil.rmtree(old_dir_path)
+
+
+def link_or_copy(from_path, dest_path):
+    try:
+        os.link(from_path, dest_path)
+    except OSError:
+        shutil.copy2(from_path, dest_path)
+
+
+def prune_outputs(root, keep):
+    # Removes files under root whose path relative to root is not in keep.
+    removed = []
+    for dir_path, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dir_path, filename)
+            if os.path.relpath(path, root) not in keep:
+                os.remove(path)
+                removed.append(path)
+    for path in removed:
+        if os.path.isdir(os.path.dirname(path)):
+            prune_empty_dirs(os.path.dirname(path), root)
+    return sorted(removed)
+
+
+def prune_empty_dirs(dir_path, root):
+    root = os.path.abspath(root)
+    dir_path = os.path.abspath(dir_path)
+    while dir_path != root and dir_path.startswith(root + os.sep):
+        if os.listdir(dir_path):
+            return
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
+
+
+def load_state(path, version, **expected):
+    # The JSON object save_state wrote to path, or None if there is none, it
+    # does not parse, or its version (or any field in expected) differs.
+    # Build state in another format is rebuilt rather than migrated.
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        try:
+            data = json.load(f)
+        except ValueError:
+            return None
+    if data.get("version") != version:
+        return None
+    if any(data.get(name) != value for name, value in expected.items()):
+        return None
+    return data
+
+
+def save_state(path, version, data, **options):
+    # Writes {"version": version, **data} as JSON (options go to json.dump)
+    # through a temporary file, so an interrupted build never leaves a
+    # truncated one behind.
+    if path is None:
+        return
+    dir_path = os.path.dirname(path)
+    if dir_path != "":
+        os.makedirs(dir_path, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": version, **data}, f, **options)
+    os.replace(tmp_path, path)
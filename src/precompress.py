@@ -0,0 +1,53 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+from output import write_if_changed
+
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".svg", ".txt", ".xml")
+
+
+def compress_outputs(root, paths, previous=None, threads=8):
+    # Writes a gzip sidecar (path + ".gz") next to every compressible file in
+    # paths, relative to root. previous maps a path to the {"hash", "gzip"}
+    # entry returned by the last run; a file whose hash is unchanged is not
+    # compressed again. Files that do not get smaller get no sidecar. Returns
+    # the entries for this run.
+    previous = previous or {}
+    entries = {}
+    pending = []
+    for rel_path in sorted(paths):
+        if not rel_path.endswith(COMPRESSIBLE_EXTENSIONS):
+            continue
+        digest = hash_file(os.path.join(root, rel_path))
+        entry = previous.get(rel_path)
+        if entry is not None and entry["hash"] == digest:
+            if not entry["gzip"] or os.path.exists(os.path.join(root, rel_path + ".gz")):
+                entries[rel_path] = entry
+                continue
+        pending.append((rel_path, digest))
+
+    # zlib releases the GIL while it compresses, so threads run in parallel.
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = executor.map(lambda item: compress_file(os.path.join(root, item[0])), pending)
+        for (rel_path, digest), written in zip(pending, results):
+            if written:
+                print(f" * {os.path.join(root, rel_path)}.gz")
+            entries[rel_path] = {"hash": digest, "gzip": written}
+    return entries
+
+
+def compress_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    # A fixed mtime and no file name make the output depend on data alone.
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    gz_path = path + ".gz"
+    if len(compressed) >= len(data):
+        if os.path.exists(gz_path):
+            os.remove(gz_path)
+        return False
+    write_if_changed(gz_path, compressed)
+    return True
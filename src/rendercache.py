@@ -0,0 +1,114 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+from output import load_state, save_state
+
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Modules whose code determines the HTML rendered for a block. Their source
+# is hashed into the parser version, so editing any of them invalidates
+# cached fragments without anyone having to remember to bump a number.
+RENDERER_MODULES = (
+    "highlight.py",
+    "htmlnode.py",
+    "inline_markdown.py",
+    "markdown_blocks.py",
+    "minify.py",
+    "rendercontext.py",
+    "search.py",
+    "textnode.py",
+)
+
+
+def parser_version():
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for filename in RENDERER_MODULES:
+        with open(os.path.join(src_dir, filename), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+PARSER_VERSION = parser_version()
+
+
+class RenderCache():
+    # Content-addressed cache of rendered HTML fragments with LRU eviction
+    # once the stored HTML exceeds max_bytes. It lives in memory for a build
+    # and is loaded from / saved to path between builds. A worker process's
+    # copy is created with track_updates, so it also records what it added
+    # and hit for take_updates; nothing else keeps a second copy.
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, track_updates=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.track_updates = track_updates
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.added = {}
+        self.touched = []
+
+    def key(self, context, text):
+        digest = hashlib.sha256(PARSER_VERSION.encode())
+        digest.update(b"\0")
+        digest.update(context.encode())
+        digest.update(b"\0")
+        digest.update(text.encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        if self.track_updates:
+            self.touched.append(key)
+        return value
+
+    def put(self, key, value):
+        self.store(key, value)
+        if self.track_updates:
+            self.added[key] = value
+
+    def store(self, key, value):
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self.entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def take_updates(self):
+        # Worker processes hand their new entries and hits back to the parent,
+        # which owns the cache that gets saved.
+        updates = (self.added, self.touched)
+        self.added = {}
+        self.touched = []
+        return updates
+
+    def apply_updates(self, updates):
+        added, touched = updates
+        for key in touched:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+        for key, value in added.items():
+            self.store(key, value)
+
+    def load(self):
+        data = load_state(self.path, CACHE_FORMAT_VERSION, parser=PARSER_VERSION)
+        if data is None:
+            return
+        for key, value in data["entries"]:
+            self.store(key, value)
+
+    def save(self):
+        data = {"parser": PARSER_VERSION, "entries": list(self.entries.items())}
+        save_state(self.path, CACHE_FORMAT_VERSION, data)
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import re
+
+from minify import collapse_whitespace
+from search import tokenize
+
+
+ASSET_CANDIDATE_PATTERN = re.compile(r"/[^\s\"'()<>\[\]]*")
+
+
+class RenderContext():
+    # Build-wide settings that affect how markdown is rendered. It is passed
+    # down to the nodes that need it, so nothing has to rewrite the rendered
+    # HTML afterwards. With search set it also collects the words of the page
+    # being rendered, and with collect_links the link and image URLs, straight
+    # from its text nodes. With minify set, runs of whitespace in text (but
+    # not in code) are collapsed. assets maps asset URL paths to their
+    # fingerprinted names; output only depends on the entries a text
+    # mentions, so assets_key(text) rather than cache_key() covers them.
+    def __init__(self, basepath="/", search=False, minify=False, assets=None, collect_links=False):
+        self.basepath = basepath
+        self.search = search
+        self.minify = minify
+        self.assets = assets or {}
+        self.assets_digest = ""
+        if self.assets:
+            self.assets_digest = digest(sorted(self.assets.items()))
+        self.collect_links = collect_links
+        self.words = None
+        self.links = None
+        self.collecting = False
+
+    def begin_page(self):
+        self.words = [] if self.search else None
+        self.links = [] if self.collect_links else None
+        self.collecting = self.search or self.collect_links
+        return self.words, self.links
+
+    def collect(self, text_nodes):
+        for text_node in text_nodes:
+            if self.words is not None:
+                self.words.extend(tokenize(text_node.text))
+            if self.links is not None:
+                self.add_links(text_node)
+
+    def add_links(self, text_node):
+        if text_node.url is not None:
+            self.links.append(text_node.url)
+        for child in text_node.children or ():
+            self.add_links(child)
+
+    def collected(self):
+        # (name, list) for each kind of page data being collected.
+        return [(name, values) for name, values in (("words", self.words), ("links", self.links)) if values is not None]
+
+    def resolve_url(self, url):
+        # Site-absolute URLs are moved under the basepath, and renamed if they
+        # point at a fingerprinted asset; relative, protocol-relative and
+        # external URLs are left alone.
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+        if self.assets:
+            path, suffix = split_url(url)
+            url = self.assets.get(path, path) + suffix
+        return self.basepath + url[1:]
+
+    def text(self, text):
+        if self.minify:
+            return collapse_whitespace(text)
+        return text
+
+    def cache_key(self):
+        # Everything above that changes rendered output, except the asset
+        # map, for RenderCache keys and the build manifest.
+        return f"basepath={self.basepath};minify={self.minify}"
+
+    def assets_key(self, text):
+        # Identifies the fingerprinted names of the assets text may link to,
+        # so changing one asset only invalidates the blocks and pages that
+        # mention it. Any "/..." run is looked up, which can only over-match.
+        if not self.assets:
+            return ""
+        used = set()
+        for candidate in ASSET_CANDIDATE_PATTERN.findall(text):
+            path, _ = split_url(candidate)
+            if path in self.assets:
+                used.add(path)
+        if not used:
+            return ""
+        return digest([(path, self.assets[path]) for path in sorted(used)])
+
+
+def digest(value):
+    return hashlib.sha256(json.dumps(value).encode()).hexdigest()[:16]
+
+
+def split_url(url):
+    # "/a.css?v=1#top" -> ("/a.css", "?v=1#top")
+    match = re.search(r"[?#]", url)
+    if match is None:
+        return url, ""
+    return url[: match.start()], url[match.start() :]
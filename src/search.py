@@ -0,0 +1,112 @@
+import itertools
+import json
+import os
+import re
+
+from output import load_state, save_state, write_if_changed
+
+
+SEARCH_FORMAT_VERSION = 1
+SEARCH_DIR = "search"
+PREFIX_LENGTH = 2
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    return [word.lower() for word in WORD_PATTERN.findall(text)]
+
+
+def shard_name(term):
+    # Shards are named after the first PREFIX_LENGTH characters of their
+    # terms; anything outside [a-z0-9] is spelled as hex to keep file names
+    # and URLs plain.
+    prefix = term[:PREFIX_LENGTH]
+    if re.fullmatch(r"[a-z0-9]+", prefix):
+        return prefix
+    return "x" + prefix.encode().hex()
+
+
+def page_url(dest_path, dest_root, basepath):
+    rel_path = os.path.relpath(dest_path, dest_root).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return basepath
+    if rel_path.endswith("/index.html"):
+        rel_path = rel_path[: -len("index.html")]
+    return basepath + rel_path
+
+
+class SearchIndex():
+    # Inverted index over the words of every page, written into the site as
+    #   search/pages.json      [[url, title], ...], indexed by page id
+    #   search/<prefix>.json   {term: [[page id, position, ...], ...]}
+    # so a search page only fetches the shards for the terms it looks up.
+    # The words of each page are kept in path between builds, so an
+    # incremental build only re-reads the pages that changed. Page ids are
+    # kept there too: a page keeps its id while it exists, so adding or
+    # removing a page only changes pages.json and the shards of its terms.
+    # Ids of removed pages are null in pages.json until a new page takes
+    # them.
+    def __init__(self, path=None):
+        self.path = path
+        self.pages = {}
+        self.written = set()
+
+    def update(self, from_path, url, title, words):
+        page = {"url": url, "title": title, "words": words}
+        previous = self.pages.get(str(from_path))
+        if previous is not None and "id" in previous:
+            page["id"] = previous["id"]
+        self.pages[str(from_path)] = page
+
+    def retain(self, seen):
+        seen = set(str(from_path) for from_path in seen)
+        for from_path in list(self.pages):
+            if from_path not in seen:
+                del self.pages[from_path]
+
+    def assign_ids(self):
+        # New pages take the lowest free ids in URL order, so an index built
+        # from scratch numbers its pages by URL.
+        used = set(page["id"] for page in self.pages.values() if "id" in page)
+        free = (page_id for page_id in itertools.count() if page_id not in used)
+        new_pages = [page for page in self.pages.values() if "id" not in page]
+        for page in sorted(new_pages, key=lambda page: page["url"]):
+            page["id"] = next(free)
+
+    def shards(self):
+        self.assign_ids()
+        pages = sorted(self.pages.values(), key=lambda page: page["id"])
+        entries = [None] * (pages[-1]["id"] + 1 if pages else 0)
+        shards = {}
+        for page in pages:
+            entries[page["id"]] = [page["url"], page["title"]]
+            postings = {}
+            for position, word in enumerate(page["words"]):
+                postings.setdefault(word, [page["id"]]).append(position)
+            for term, posting in postings.items():
+                shards.setdefault(shard_name(term), {}).setdefault(term, []).append(posting)
+        return entries, shards
+
+    def write(self, dest_dir_path):
+        pages, shards = self.shards()
+        files = {"pages.json": pages}
+        for name, terms in shards.items():
+            files[f"{name}.json"] = dict(sorted(terms.items()))
+        self.written = set()
+        for filename, data in files.items():
+            rel_path = os.path.join(SEARCH_DIR, filename)
+            write_if_changed(os.path.join(dest_dir_path, rel_path), json.dumps(data, separators=(",", ":")))
+            self.written.add(rel_path)
+        return sorted(self.written)
+
+    def outputs(self):
+        return set(self.written)
+
+    def load(self):
+        data = load_state(self.path, SEARCH_FORMAT_VERSION)
+        if data is None:
+            return
+        self.pages = data["pages"]
+
+    def save(self):
+        save_state(self.path, SEARCH_FORMAT_VERSION, {"pages": self.pages})
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+
+from output import link_or_copy, publish_file
+
+
+SHARD_FORMAT_VERSION = 1
+SHARD_MANIFEST = "shard.json"
+
+
+def parse_shard(text):
+    # "K/N" -> (K, N), with shards numbered from 1.
+    index, sep, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        index = count = 0
+    if sep != "/" or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"invalid shard {text!r}, expected K/N with 1 <= K <= N")
+    return index, count
+
+
+def shard_of(rel_path, count):
+    # Depends only on the "/"-separated path relative to its source directory,
+    # so every machine assigns a file to the same shard.
+    digest = hashlib.sha256(rel_path.replace(os.sep, "/").encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def in_shard(rel_path, shard):
+    return shard is None or shard_of(rel_path, shard[1]) == shard[0]
+
+
+def shard_name(shard):
+    return f"{shard[0]}-of-{shard[1]}"
+
+
+def shard_dir_path(dest_dir_path, shard):
+    return os.path.join(dest_dir_path.rstrip("/\\") + ".shards", shard_name(shard))
+
+
+def shard_state_path(path, shard):
+    # Build state of a shard is kept apart from a full build's, and from
+    # other shards built on the same machine.
+    if shard is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard_name(shard)}{ext}"
+
+
+def write_shard_manifest(dest_dir_path, shard, inputs, files, sources=(), search=None, links=None):
+    # Everything the merge needs travels with the shard's tree: the files it
+    # produced, the inputs they were built from (which must match across
+    # shards), and the search and link data of its pages, which can only be
+    # finished once every page is known.
+    data = {
+        "version": SHARD_FORMAT_VERSION,
+        "shard": list(shard),
+        "inputs": inputs,
+        "files": sorted(path.replace(os.sep, "/") for path in files),
+        "sources": sorted(path.replace(os.sep, "/") for path in sources),
+        "search": search,
+        "links": links,
+    }
+    tmp_path = os.path.join(dest_dir_path, SHARD_MANIFEST + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    publish_file(tmp_path, os.path.join(dest_dir_path, SHARD_MANIFEST))
+    return SHARD_MANIFEST
+
+
+def load_shards(shard_dir_paths):
+    # Reads and cross-checks the manifests of a complete set of shards.
+    shards = []
+    for dir_path in shard_dir_paths:
+        path = os.path.join(dir_path, SHARD_MANIFEST)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"{dir_path}: not a shard build ({e})")
+        if data.get("version") != SHARD_FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported shard format")
+        data["root"] = dir_path
+        shards.append(data)
+    if not shards:
+        raise ValueError("no shards to merge")
+
+    count = shards[0]["shard"][1]
+    indexes = sorted(data["shard"][0] for data in shards)
+    if any(data["shard"][1] != count for data in shards) or indexes != list(range(1, count + 1)):
+        found = ", ".join(shard_name(data["shard"]) for data in shards)
+        raise ValueError(f"expected shards 1 to {count} of {count} exactly once, got {found}")
+    for data in shards[1:]:
+        if data["inputs"] != shards[0]["inputs"]:
+            raise ValueError(f"{data['root']} was built with different inputs than {shards[0]['root']}")
+    return sorted(shards, key=lambda data: data["shard"][0])
+
+
+def find_collisions(shards):
+    # (path, [shard, ...]) for every output produced by more than one shard.
+    owners = {}
+    for data in shards:
+        for path in data["files"]:
+            owners.setdefault(path, []).append(shard_name(data["shard"]))
+    return sorted((path, names) for path, names in owners.items() if len(names) > 1)
+
+
+def merge_shards(shards, dest_dir_path):
+    # Links (or copies) the files of every shard into dest_dir_path, which
+    # ends up holding the same files as a build of the whole site. Nothing is
+    # written if two shards produced the same path. Files already in
+    # dest_dir_path with the same contents are kept. Returns the merged
+    # outputs, relative to dest_dir_path.
+    collisions = find_collisions(shards)
+    if collisions:
+        lines = [f"  {path}: {', '.join(names)}" for path, names in collisions]
+        raise ValueError("output paths produced by more than one shard:\n" + "\n".join(lines))
+
+    outputs = set()
+    for data in shards:
+        for path in data["files"]:
+            rel_path = os.path.normpath(path)
+            dest_path = os.path.join(dest_dir_path, rel_path)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            tmp_path = dest_path + ".merge.tmp"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            link_or_copy(os.path.join(data["root"], rel_path), tmp_path)
+            if publish_file(tmp_path, dest_path):
+                print(f" * {os.path.join(data['root'], rel_path)} -> {dest_path}")
+            outputs.add(rel_path)
+    return outputs
@@ -0,0 +1,78 @@
+import io
+import re
+
+from htmlnode import HTMLNode
+from minify import HTMLMinifier
+from rendercontext import RenderContext
+
+
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+URL_PATTERN = re.compile(r'\b(href|src)="(/(?!/)[^"]*)"')
+
+
+class Template():
+    # A template pre-split into static text and named "{{ Name }}" slots, so
+    # a page is assembled with a single join instead of a replace per slot.
+    # Slots that are not given a value keep their original text. URL
+    # attributes in the static text are resolved through the render context
+    # once, here, and recorded in urls as (attribute, url) pairs; when the
+    # context minifies, so is the static text.
+    def __init__(self, source, context=None):
+        self.context = context if context is not None else RenderContext()
+        self.parts = []
+        self.slots = {}
+        self.slot_names = {}
+        self.urls = []
+        minifier = HTMLMinifier() if self.context.minify else None
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.parts.append(self.static_text(source[position:match.start()], minifier))
+            self.slots.setdefault(match.group(1), []).append(len(self.parts))
+            self.slot_names[len(self.parts)] = match.group(1)
+            self.parts.append(match.group(0))
+            position = match.end()
+        self.parts.append(self.static_text(source[position:], minifier))
+
+    def static_text(self, text, minifier):
+        text = self.resolve_urls(text)
+        if minifier is not None:
+            text = minifier.minify(text)
+        return text
+
+    def resolve_urls(self, text):
+        def resolve(match):
+            attribute, url = match.groups()
+            self.urls.append((attribute, url))
+            return f'{attribute}="{self.context.resolve_url(url)}"'
+        return URL_PATTERN.sub(resolve, text)
+
+    def render(self, values):
+        buffer = io.StringIO()
+        self.write(buffer, values)
+        return buffer.getvalue()
+
+    def write(self, writer, values):
+        # Slot values may be strings, HTMLNode trees, or iterables of either;
+        # trees are streamed straight into writer without rendering them to a
+        # string first.
+        for index, part in enumerate(self.parts):
+            name = self.slot_names.get(index)
+            if name is not None and name in values:
+                write_value(writer, values[name])
+            else:
+                writer.write(part)
+
+
+def write_value(writer, value):
+    if isinstance(value, str):
+        writer.write(value)
+    elif isinstance(value, HTMLNode):
+        value.write_html(writer)
+    else:
+        for chunk in value:
+            write_value(writer, chunk)
+
+
+def load_template(template_path, context=None):
+    with open(template_path, "r") as f:
+        return Template(f.read(), context)
@@ -0,0 +1,41 @@
+import importlib
+import os
+import tempfile
+import unittest
+
+from bench.corpus import generate_site
+
+
+class TestBenchCorpus(unittest.TestCase):
+    def read_site(self, root):
+        files = {}
+        for dir_path, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_generate_site_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first = os.path.join(tmp, "first")
+            second = os.path.join(tmp, "second")
+            other = os.path.join(tmp, "other")
+            paths = generate_site(first, 12, 512, 4096, seed=7)
+            generate_site(second, 12, 512, 4096, seed=7)
+            generate_site(other, 12, 512, 4096, seed=8)
+            self.assertEqual(len(paths), 12)
+            site = self.read_site(first)
+            self.assertEqual(site, self.read_site(second))
+            self.assertNotEqual(site, self.read_site(other))
+            for data in site.values():
+                self.assertTrue(data.startswith(b"# "))
+
+    def test_importing_main_does_not_run_it(self):
+        # Spawned -j workers import __main__ again; that must not start a run.
+        module = importlib.import_module("bench.__main__")
+        self.assertTrue(callable(module.main))
+
+
+if __name__ == "__main__":
+    unittest.main()
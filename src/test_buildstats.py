@@ -0,0 +1,39 @@
+import unittest
+
+import buildstats
+
+
+class TestBuildStats(unittest.TestCase):
+    def tearDown(self):
+        buildstats.disable()
+
+    def test_disabled_hooks_are_no_ops(self):
+        with buildstats.page("a.md"):
+            with buildstats.stage("read"):
+                pass
+        self.assertIsNone(buildstats.current)
+
+    def test_nested_stages_record_exclusive_time(self):
+        stats = buildstats.enable()
+        with buildstats.page("a.md"):
+            with buildstats.stage("parse"):
+                with buildstats.stage("inline"):
+                    pass
+                with buildstats.stage("inline"):
+                    pass
+        self.assertEqual(stats.stages["parse"][1], 1)
+        self.assertEqual(stats.stages["inline"][1], 2)
+        self.assertEqual(sorted(stats.pages["a.md"]), ["inline", "parse"])
+        trace = stats.to_dict()
+        total = trace["pages"]["a.md"]["total"]
+        self.assertAlmostEqual(total, stats.stages["parse"][0] + stats.stages["inline"][0])
+
+    def test_merge_combines_worker_stats(self):
+        stats = buildstats.BuildStats()
+        other = buildstats.BuildStats()
+        other.page = "b.md"
+        other.add("read", 0.5)
+        stats.add("read", 0.25)
+        stats.merge(other)
+        self.assertEqual(stats.stages["read"], [0.75, 2])
+        self.assertEqual(stats.pages["b.md"], {"read": 0.5})
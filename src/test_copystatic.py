@@ -0,0 +1,58 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from copystatic import sync_files
+
+
+class TestSyncFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.source, "images"))
+        self.write(os.path.join(self.source, "index.css"), "body {}")
+        self.write(os.path.join(self.source, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def sync(self, previous=(), link=False):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            synced = sync_files(self.source, self.dest, previous, link=link)
+        return synced, output.getvalue()
+
+    def test_copies_then_skips_unchanged(self):
+        synced, output = self.sync()
+        self.assertEqual(synced, [os.path.join("images", "a.png"), "index.css"])
+        self.assertEqual(output.count(" * "), 2)
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body {}")
+
+        _, output = self.sync(synced)
+        self.assertEqual(output, "")
+
+    def test_removes_stale_files_only(self):
+        synced, _ = self.sync()
+        self.write(os.path.join(self.dest, "page.html"), "<p></p>")
+        os.remove(os.path.join(self.source, "images", "a.png"))
+
+        synced, output = self.sync(synced)
+        self.assertEqual(synced, ["index.css"])
+        self.assertIn("removed", output)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "page.html")))
+
+    def test_copy_replaces_hard_link_without_touching_source(self):
+        self.sync(link=True)
+        self.write(os.path.join(self.source, "index.css"), "body { color: red; }")
+        os.utime(os.path.join(self.source, "index.css"), ns=(0, 0))
+        self.sync()
+        with open(os.path.join(self.source, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red; }")
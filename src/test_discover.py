@@ -0,0 +1,21 @@
+import os
+import tempfile
+import unittest
+
+from discover import walk_files
+
+
+class TestWalkFiles(unittest.TestCase):
+    def test_depth_first_in_name_order_with_stats(self):
+        with tempfile.TemporaryDirectory() as root:
+            for rel_path in ["b.md", "a-b/x.md", "a/z.md", "a/c/y.md"]:
+                path = os.path.join(root, rel_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write(rel_path)
+            files = list(walk_files(root))
+            self.assertEqual(
+                [rel_path for rel_path, _ in files],
+                [os.path.join("a", "c", "y.md"), os.path.join("a", "z.md"), os.path.join("a-b", "x.md"), "b.md"],
+            )
+            self.assertEqual(files[-1][1].st_size, len("b.md"))
@@ -0,0 +1,99 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from copystatic import scan_files, sync_files
+from fingerprint import asset_urls, fingerprint_files, fingerprint_name, hash_files, keeps_name
+from gencontent import generate_pages_recursive
+from manifest import Manifest
+from markdown_blocks import markdown_to_html_node
+from rendercontext import RenderContext
+from template import Template
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name(os.path.join("images", "a.png"), "0123456789abcdef"), os.path.join("images", "a.01234567.png"))
+        self.assertEqual(fingerprint_name("LICENSE", "0123456789abcdef"), "LICENSE.01234567")
+
+    def test_sync_to_fingerprinted_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "static")
+            dest = os.path.join(tmp, "docs")
+            os.makedirs(source)
+            with open(os.path.join(source, "index.css"), "w") as f:
+                f.write("body {}")
+            names = fingerprint_files(source)
+            with contextlib.redirect_stdout(io.StringIO()):
+                synced = sync_files(source, dest, names=names)
+            self.assertEqual(synced, [names["index.css"]])
+            self.assertEqual(os.listdir(dest), [names["index.css"]])
+            self.assertRegex(names["index.css"], r"^index\.[0-9a-f]{8}\.css$")
+
+    def test_references_are_rewritten(self):
+        context = RenderContext("/site/", assets=asset_urls({"index.css": "index.abc.css", "a.png": "a.def.png"}))
+        template = Template('<link href="/index.css?v=1">{{ Content }}', context)
+        markdown = "![a](/a.png) [b](/b.png) [css](/index.css#top)"
+        content = markdown_to_html_node(markdown, context=context)
+        self.assertEqual(
+            template.render({"Content": content}),
+            '<link href="/site/index.abc.css?v=1"><div><p><img href="/site/a.def.png" alt="a"/> '
+            '<a href="/site/b.png">b</a> <a href="/site/index.abc.css#top">css</a></p></div>',
+        )
+        self.assertEqual(context.cache_key(), RenderContext("/site/").cache_key())
+        self.assertNotEqual(context.assets_key("![a](/a.png)"), context.assets_key("![c](/index.css)"))
+        self.assertEqual(context.assets_key("[b](/b.png) [c](/c)"), "")
+
+    def test_well_known_files_keep_their_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for rel_path in ("robots.txt", "favicon.ico", "CNAME", os.path.join(".well-known", "security.txt"), "a.css"):
+                path = os.path.join(tmp, rel_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write(rel_path)
+            names = fingerprint_files(tmp)
+            self.assertEqual(list(names), ["a.css"])
+            self.assertFalse(keeps_name(os.path.join("nested", "robots.txt")))
+
+    def test_unchanged_files_are_not_hashed_again(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "a.css"), "w") as f:
+                f.write("a {}")
+            files = scan_files(tmp)
+            hashes = hash_files(tmp, files)
+            # A stale hash with a matching stat is trusted, so it shows in the name.
+            hashes["a.css"]["hash"] = "feedface" + hashes["a.css"]["hash"][8:]
+            self.assertEqual(fingerprint_files(tmp, files, hash_files(tmp, files, hashes)), {"a.css": "a.feedface.css"})
+            os.utime(os.path.join(tmp, "a.css"), ns=(0, 0))
+            names = fingerprint_files(tmp, scan_files(tmp), hash_files(tmp, scan_files(tmp), hashes))
+            self.assertNotEqual(names["a.css"], "a.feedface.css")
+
+    def test_changed_asset_only_rebuilds_pages_that_mention_it(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write('<link href="/index.css">{{ Content }}')
+            for name, markdown in (("a.md", "# A\n\n![a](/a.png)"), ("b.md", "# B\n\n![b](/b.png)")):
+                with open(os.path.join(content, name), "w") as f:
+                    f.write(markdown)
+            manifest = Manifest(os.path.join(tmp, "manifest.json"))
+            dest = os.path.join(tmp, "docs")
+
+            def build(assets):
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    generate_pages_recursive(content, template, dest, "/", manifest=manifest, assets=assets)
+                return output.getvalue()
+
+            assets = {"/index.css": "/index.1.css", "/a.png": "/a.1.png", "/b.png": "/b.1.png"}
+            self.assertIn("b.md", build(assets))
+            self.assertEqual(build(dict(assets)), "")
+            log = build(dict(assets, **{"/a.png": "/a.2.png"}))
+            self.assertIn("a.md", log)
+            self.assertNotIn("b.md", log)
+            log = build(dict(assets, **{"/a.png": "/a.2.png", "/index.css": "/index.2.css"}))
+            self.assertIn("b.md", log)
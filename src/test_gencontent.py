@@ -0,0 +1,82 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from gencontent import generate_pages_recursive
+from links import LinkIndex
+from manifest import Manifest
+from rendercache import RenderCache
+from search import SearchIndex
+
+
+TEMPLATE = "<title>{{ Title }}</title><link href=\"/index.css\">{{ Content }}"
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write(TEMPLATE)
+        self.write_content("index.md", "# Home\n\n[blog](/blog/)")
+        self.write_content(os.path.join("blog", "index.md"), "# Blog\n\n- **one**\n- two")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_content(self, name, text):
+        path = os.path.join(self.content, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self, engine, name, **kwargs):
+        dest = os.path.join(self.tmp.name, name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, dest, "/site/", engine=engine, **kwargs)
+        outputs = {}
+        for dir_path, _, filenames in os.walk(dest):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                with open(path) as f:
+                    outputs[os.path.relpath(path, dest)] = f.read()
+        return outputs
+
+    def test_asyncio_engine_matches_sync(self):
+        outputs = self.build("asyncio", "async")
+        self.assertEqual(outputs, self.build("sync", "sync"))
+        self.assertEqual(
+            outputs["index.html"],
+            '<title>Home</title><link href="/site/index.css"><div><h1>Home</h1><p><a href="/site/blog/">blog</a></p></div>',
+        )
+
+    def test_parallel_jobs_match_serial(self):
+        for i in range(6):
+            self.write_content(os.path.join("posts", f"{i}.md"), f"# Post {i}\n\nshared [home](/)\n\n```py\nx = {i}\n```")
+        states = {}
+        for name, jobs in (("serial", 1), ("parallel", 2)):
+            state = {
+                "manifest": Manifest(os.path.join(self.tmp.name, name + ".json")),
+                "cache": RenderCache(),
+                "search": SearchIndex(),
+                "links": LinkIndex(),
+            }
+            state["outputs"] = self.build("sync", name, jobs=jobs, **{key: state[key] for key in ("manifest", "cache", "search", "links")})
+            states[name] = state
+        serial, parallel = states["serial"], states["parallel"]
+        self.assertEqual(parallel["outputs"], serial["outputs"])
+        self.assertEqual(len(parallel["manifest"].pages), 8)
+        self.assertEqual(parallel["manifest"].pages, serial["manifest"].pages)
+        # Results rendered in the workers reach the parent's indexes and cache.
+        self.assertEqual(parallel["search"].pages, serial["search"].pages)
+        self.assertEqual(parallel["links"].pages, serial["links"].pages)
+        self.assertEqual(set(parallel["cache"].entries), set(serial["cache"].entries))
+        self.assertTrue(parallel["cache"].entries)
+
+    def test_asyncio_engine_raises_page_errors(self):
+        self.write_content("notitle.md", "no heading here")
+        with self.assertRaisesRegex(ValueError, "no title found"):
+            self.build("asyncio", "async")
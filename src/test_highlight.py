@@ -0,0 +1,39 @@
+import unittest
+
+from highlight import highlight
+from markdown_blocks import markdown_to_html_node
+from rendercache import RenderCache
+from rendercontext import RenderContext
+
+
+class TestHighlight(unittest.TestCase):
+    def test_python_tokens(self):
+        self.assertEqual(
+            highlight("python", 'def f():  # <x>\n    return "a" + 1'),
+            '<span class="k">def</span> f():  <span class="c"># &lt;x&gt;</span>\n'
+            '    <span class="k">return</span> <span class="s">"a"</span> + <span class="m">1</span>',
+        )
+
+    def test_unknown_language_is_only_escaped(self):
+        self.assertEqual(highlight("klingon", "a < b"), "a &lt; b")
+
+    def test_fence_language_selects_lexer(self):
+        html = markdown_to_html_node("```js\nlet a = 'x';\n```").to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code class="language-js"><span class="k">let</span> a = <span class="s">\'x\'</span>;\n'
+            "</code></pre></div>",
+        )
+
+    def test_fence_without_language_is_unchanged(self):
+        html = markdown_to_html_node("```\nprint(\"<b>\")\n```").to_html()
+        self.assertEqual(html, '<div><pre><code>print("<b>")\n</code></pre></div>')
+
+    def test_highlighting_is_memoized(self):
+        cache = RenderCache()
+        markdown = "```python\nx = 1\n```"
+        first = markdown_to_html_node(markdown, cache).to_html()
+        # Other render settings miss the block cache but not the highlighter.
+        second = markdown_to_html_node(markdown, cache, RenderContext(minify=True)).to_html()
+        self.assertEqual(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
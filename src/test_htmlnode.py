@@ -1,3 +1,5 @@
+import io
+import sys
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -125,5 +127,27 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(result, "<div><div width=\"50px\" height=\"50px\" display=\"block\"><div><p>Hello nested world!</p></div></div></div>")
 
 
+    def test_write_html_matches_to_html(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("b", "Bold text"),
+                LeafNode(None, "Normal text"),
+                LeafNode("a", "link", {"href": "/x"}),
+            ],
+        )
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), node.to_html())
+
+    def test_deep_tree_does_not_recurse(self):
+        node = LeafNode(None, "deep")
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = ParentNode("span", [node])
+        result = node.to_html()
+        self.assertTrue(result.startswith("<span><span>"))
+        self.assertIn("deep", result)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+import unittest
+
+from inline_markdown import text_to_textnodes
+from textnode import TextNode, TextType, text_node_to_html_node
+
+
+class TestTextToTextNodes(unittest.TestCase):
+    def test_all_inline_types(self):
+        text = "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
+        self.assertEqual(
+            text_to_textnodes(text),
+            [
+                TextNode("This is ", TextType.TEXT),
+                TextNode("text", TextType.BOLD),
+                TextNode(" with an ", TextType.TEXT),
+                TextNode("italic", TextType.ITALIC),
+                TextNode(" word and a ", TextType.TEXT),
+                TextNode("code block", TextType.CODE),
+                TextNode(" and an ", TextType.TEXT),
+                TextNode("obi wan image", TextType.IMAGE, "https://i.imgur.com/fJRm4Vk.jpeg"),
+                TextNode(" and a ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "https://boot.dev"),
+            ],
+        )
+
+    def test_empty_text(self):
+        self.assertEqual(text_to_textnodes(""), [])
+
+    def test_unclosed_delimiter_raises(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("an _unclosed span")
+
+    def test_code_span_wins_over_emphasis(self):
+        self.assertEqual(
+            text_to_textnodes("call `snake_case` now"),
+            [
+                TextNode("call ", TextType.TEXT),
+                TextNode("snake_case", TextType.CODE),
+                TextNode(" now", TextType.TEXT),
+            ],
+        )
+
+    def test_link_url_with_underscores(self):
+        self.assertEqual(
+            text_to_textnodes("[docs](/a_b_c)"),
+            [TextNode("docs", TextType.LINK, "/a_b_c")],
+        )
+
+    def test_nested_emphasis(self):
+        nodes = text_to_textnodes("a **bold _and italic_** b")
+        self.assertEqual(
+            nodes,
+            [
+                TextNode("a ", TextType.TEXT),
+                TextNode(
+                    "bold and italic",
+                    TextType.BOLD,
+                    None,
+                    [
+                        TextNode("bold ", TextType.TEXT),
+                        TextNode("and italic", TextType.ITALIC),
+                    ],
+                ),
+                TextNode(" b", TextType.TEXT),
+            ],
+        )
+        self.assertEqual(text_node_to_html_node(nodes[1]).to_html(), "<b>bold <i>and italic</i></b>")
+
+    def test_unclosed_nested_delimiter_stays_literal(self):
+        self.assertEqual(text_to_textnodes("**a_b**"), [TextNode("a_b", TextType.BOLD)])
@@ -0,0 +1,43 @@
+import unittest
+
+from links import LinkIndex, link_target, target_exists
+from markdown_blocks import markdown_to_html_chunks_and_title
+from rendercache import RenderCache
+from rendercontext import RenderContext
+
+
+class TestLinks(unittest.TestCase):
+    def test_link_target(self):
+        page = "blog/tom/index.html"
+        self.assertEqual(link_target("/blog/majesty#top", page), "blog/majesty")
+        self.assertEqual(link_target("../majesty/", page), "blog/majesty")
+        self.assertEqual(link_target("/", page), "")
+        self.assertIsNone(link_target("https://example.com/", page))
+        self.assertIsNone(link_target("mailto:a@b.c", page))
+        self.assertIsNone(link_target("#section", page))
+
+    def test_target_exists(self):
+        outputs = {"index.html", "blog/tom/index.html", "about.html", "images/a.png"}
+        for target in ("", "blog/tom", "about", "images/a.png"):
+            self.assertTrue(target_exists(target, outputs), target)
+        self.assertFalse(target_exists("blog/majesty", outputs))
+
+    def test_collects_links_from_text_nodes_and_cache(self):
+        markdown = "# T\n\n[a](/a) **[b](/b)** ![c](/c.png)"
+        cache = RenderCache()
+        context = RenderContext(collect_links=True)
+        results = []
+        for _ in range(2):
+            _, links = context.begin_page()
+            chunks, _ = markdown_to_html_chunks_and_title(markdown, cache, context)
+            "".join(chunks)
+            results.append(links)
+        self.assertEqual(results, [["/a", "/b", "/c.png"]] * 2)
+
+    def test_broken_links(self):
+        index = LinkIndex()
+        index.update("a.md", "a/index.html", ["/", "/b", "/missing", "https://x.y"])
+        index.update("b.md", "b/index.html", ["../a/"])
+        self.assertEqual(index.broken({"index.html", "a/index.html", "b/index.html"}), [("a.md", "/missing")])
+        index.retain({"b.md"})
+        self.assertEqual(index.broken(set()), [("b.md", "../a/")])
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from manifest import Manifest
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.path = os.path.join(self.root, "manifest.json")
+        self.out = os.path.join(self.root, "out")
+        self.dest = os.path.join(self.out, "page.html")
+        os.makedirs(os.path.dirname(self.dest))
+        with open(self.dest, "w") as f:
+            f.write("<p>hi</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_keeps_pages_fresh(self):
+        manifest = Manifest(self.path)
+        manifest.set_inputs("t1", "/")
+        manifest.record("page.md", "abc", self.dest, self.out)
+        manifest.save()
+
+        loaded = Manifest(self.path)
+        loaded.load()
+        loaded.set_inputs("t1", "/")
+        self.assertTrue(loaded.is_fresh("page.md", "abc", self.dest, self.out))
+        self.assertFalse(loaded.is_fresh("page.md", "def", self.dest, self.out))
+        self.assertEqual(loaded.outputs(), {"page.html"})
+
+    def test_template_change_invalidates_pages(self):
+        manifest = Manifest(self.path)
+        manifest.set_inputs("t1", "/")
+        manifest.record("page.md", "abc", self.dest, self.out)
+        manifest.set_inputs("t2", "/")
+        self.assertFalse(manifest.is_fresh("page.md", "abc", self.dest, self.out))
+
+    def test_option_change_invalidates_pages(self):
+        manifest = Manifest(self.path)
+        manifest.set_inputs("t1", "/", "minify=False")
+        manifest.record("page.md", "abc", self.dest, self.out)
+        manifest.set_inputs("t1", "/", "minify=True")
+        self.assertFalse(manifest.is_fresh("page.md", "abc", self.dest, self.out))
+
+    def test_unchanged_hash_uses_recorded_stat(self):
+        manifest = Manifest(self.path)
+        stat = os.stat(self.dest)
+        manifest.record("page.md", "abc", self.dest, self.out, stat)
+        self.assertEqual(manifest.unchanged_hash("page.md", stat), "abc")
+        os.utime(self.dest, ns=(0, 0))
+        self.assertIsNone(manifest.unchanged_hash("page.md", os.stat(self.dest)))
+
+    def test_remove_missing_deletes_output(self):
+        manifest = Manifest(self.path)
+        manifest.record("page.md", "abc", self.dest, self.out)
+        removed = manifest.remove_missing(set(), self.out)
+        self.assertEqual(removed, [self.dest])
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertTrue(os.path.exists(self.out))
@@ -0,0 +1,101 @@
+import io
+import unittest
+
+from markdown_blocks import (
+    BlockScan,
+    BlockType,
+    iter_blocks,
+    markdown_to_blocks,
+    markdown_to_html_chunks_and_title,
+    markdown_to_html_node,
+    markdown_to_html_node_and_title,
+    markdown_to_html_stream,
+)
+from rendercontext import RenderContext
+from template import write_value
+
+
+MARKDOWN = """# Heading
+
+This is **bolded** paragraph
+text in a p
+tag here
+
+
+
+- a list
+- with items
+
+```
+code block
+```
+"""
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        self.assertEqual(list(iter_blocks(io.StringIO(MARKDOWN))), markdown_to_blocks(MARKDOWN))
+
+    def test_skips_whitespace_only_blocks(self):
+        self.assertEqual(list(iter_blocks(["a", "", "   ", "", "b"])), ["a", "b"])
+
+
+class TestBlockScan(unittest.TestCase):
+    def test_classifies_blocks_and_records_title(self):
+        scan = BlockScan(MARKDOWN.split("\n"))
+        blocks = list(scan)
+        self.assertEqual(
+            [block_type for block_type, _ in blocks],
+            [BlockType.HEADING, BlockType.PARAGRAPH, BlockType.ULIST, BlockType.CODE],
+        )
+        self.assertEqual(blocks[2][1], ["- a list", "- with items"])
+        self.assertEqual(scan.title, "Heading")
+
+    def test_strips_block_edges(self):
+        blocks = list(BlockScan(["   ", "  1. one ", "2. two  ", "  "]))
+        self.assertEqual(blocks, [(BlockType.OLIST, ["1. one ", "2. two"])])
+
+    def test_title_is_first_heading_line_anywhere(self):
+        _, title = markdown_to_html_node_and_title("intro\n# Late title\n\n# Second")
+        self.assertEqual(title, "Late title")
+
+    def test_missing_title_is_none(self):
+        _, title = markdown_to_html_node_and_title("## Not a title")
+        self.assertIsNone(title)
+
+
+class TestMarkdownToHtmlStream(unittest.TestCase):
+    def test_matches_tree_rendering(self):
+        buffer = io.StringIO()
+        write_value(buffer, markdown_to_html_stream(io.StringIO(MARKDOWN)))
+        self.assertEqual(buffer.getvalue(), markdown_to_html_node(MARKDOWN).to_html())
+
+    def test_empty_document_raises(self):
+        with self.assertRaises(ValueError):
+            list(markdown_to_html_stream(io.StringIO("\n\n")))
+
+
+class TestMarkdownToHtmlChunks(unittest.TestCase):
+    def test_matches_tree_rendering(self):
+        markdown = MARKDOWN + "\n1. *one* `x`\n2. [two](/2)\n\n> quote **_nested_ b**\n\n```py\nx = 1\n```"
+        for context in (None, RenderContext("/site/", minify=True)):
+            chunks, title = markdown_to_html_chunks_and_title(markdown, context=context)
+            node, tree_title = markdown_to_html_node_and_title(markdown, context=context)
+            self.assertEqual("".join(chunks), node.to_html())
+            self.assertEqual(title, tree_title)
+
+    def test_empty_item_raises_like_tree(self):
+        chunks, _ = markdown_to_html_chunks_and_title("# T\n\n- \n- a")
+        with self.assertRaisesRegex(ValueError, "children is required"):
+            "".join(chunks)
+
+
+class TestRenderContext(unittest.TestCase):
+    def test_basepath_applies_to_link_and_image_nodes_only(self):
+        markdown = '[home](/) ![cat](/cat.png) [out](https://x.org)\n\n```\n<a href="/raw">\n```'
+        html = markdown_to_html_node(markdown, context=RenderContext("/site/")).to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/site/">home</a> <img href="/site/cat.png" alt="cat"/> '
+            '<a href="https://x.org">out</a></p><pre><code><a href="/raw">\n</code></pre></div>',
+        )
@@ -0,0 +1,35 @@
+import unittest
+
+from markdown_blocks import markdown_to_html_node
+from minify import minify_html
+from rendercontext import RenderContext
+from template import Template
+
+
+class TestMinify(unittest.TestCase):
+    def test_strips_formatting_whitespace_and_comments(self):
+        html = "<ul>\n  <li>a  b</li>\n  <!-- note -->\n  <li><b>x</b> <i>y</i></li>\n</ul>\n"
+        self.assertEqual(minify_html(html), "<ul><li>a b</li><li><b>x</b> <i>y</i></li></ul>")
+
+    def test_preserves_pre_content(self):
+        html = "<div>\n  <pre>  keep\n    this  </pre>\n</div>"
+        self.assertEqual(minify_html(html), "<div><pre>  keep\n    this  </pre></div>")
+
+    def test_template_static_text_is_minified_once(self):
+        template = Template("<body>\n  <pre>\n{{ Content }}\n</pre>\n  <p>\n    {{ Title }}\n  </p>\n</body>", RenderContext(minify=True))
+        result = template.render({"Title": "T", "Content": "  x  "})
+        # What a slot holds is not known, so the whitespace around it stays.
+        self.assertEqual(result, "<body><pre>\n  x  \n</pre><p> T </p></body>")
+
+    def test_line_breaks_between_inline_elements_keep_a_space(self):
+        self.assertEqual(minify_html("<p><b>a</b>\n<i>b</i>\n  c\n</p>"), "<p><b>a</b> <i>b</i> c </p>")
+        self.assertEqual(minify_html("<div>\n  <span>a</span>\n  <span>b</span>\n</div>"), "<div> <span>a</span> <span>b</span> </div>")
+
+    def test_inline_markup_next_to_a_slot_keeps_a_space(self):
+        template = Template("<p>\n  <a href=\"/\">home</a>\n  {{ Content }}\n</p>", RenderContext(minify=True))
+        self.assertEqual(template.render({"Content": "x"}), '<p> <a href="/">home</a> x </p>')
+
+    def test_content_text_collapses_but_code_is_exact(self):
+        markdown = "a   **b  c**\n   d `x   y`\n\n```\n  code   here\n```"
+        html = markdown_to_html_node(markdown, context=RenderContext(minify=True)).to_html()
+        self.assertEqual(html, "<div><p>a <b>b c</b> d <code>x   y</code></p><pre><code>  code   here\n</code></pre></div>")
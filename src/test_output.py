@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+import output
+from output import begin_publish, finish_publish, load_state, prune_outputs, save_state, write_if_changed
+
+
+class TestOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "docs")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_identical_write_keeps_file(self):
+        path = os.path.join(self.root, "a", "index.html")
+        self.assertTrue(write_if_changed(path, "<p>a</p>"))
+        before = os.stat(path)
+        self.assertFalse(write_if_changed(path, "<p>a</p>"))
+        self.assertFalse(write_if_changed(path, b"<p>a</p>"))
+        self.assertEqual(os.stat(path).st_ino, before.st_ino)
+        self.assertEqual(os.stat(path).st_mtime_ns, before.st_mtime_ns)
+
+        self.assertTrue(write_if_changed(path, "<p>b</p>"))
+        with open(path) as f:
+            self.assertEqual(f.read(), "<p>b</p>")
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["index.html"])
+
+    def test_unchanged_in_memory_write_creates_no_temp_file(self):
+        path = os.path.join(self.root, "a.json")
+        write_if_changed(path, "{}")
+        opened = []
+        original = output.open_output
+        output.open_output = lambda *args: opened.append(args) or original(*args)
+        try:
+            write_if_changed(path, "{}")
+            self.assertEqual(opened, [])
+            write_if_changed(path, "[]")
+            self.assertEqual(len(opened), 1)
+        finally:
+            output.open_output = original
+
+    def test_changed_write_does_not_write_through_hard_links(self):
+        path = os.path.join(self.root, "a.html")
+        linked = os.path.join(self.tmp.name, "linked.html")
+        write_if_changed(path, "old")
+        os.link(path, linked)
+        write_if_changed(path, "new")
+        with open(linked) as f:
+            self.assertEqual(f.read(), "old")
+
+    def test_state_round_trip_and_rejection(self):
+        path = os.path.join(self.tmp.name, "state", "a.json")
+        self.assertIsNone(load_state(path, 1))
+        save_state(path, 1, {"parser": "p", "pages": {"a": 1}})
+        self.assertEqual(load_state(path, 1, parser="p"), {"version": 1, "parser": "p", "pages": {"a": 1}})
+        self.assertIsNone(load_state(path, 2))
+        self.assertIsNone(load_state(path, 1, parser="q"))
+        with open(path, "w") as f:
+            f.write("{truncated")
+        self.assertIsNone(load_state(path, 1))
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["a.json"])
+
+    def test_staged_build_does_not_touch_live_tree(self):
+        live = os.path.join(self.root, "index.html")
+        write_if_changed(live, "old")
+        staging = begin_publish(self.root)
+        write_if_changed(os.path.join(staging, "index.html"), "new")
+        with open(live) as f:
+            self.assertEqual(f.read(), "old")
+
+        finish_publish(staging, self.root)
+        with open(live) as f:
+            self.assertEqual(f.read(), "new")
+        self.assertFalse(os.path.exists(staging))
+
+    def test_prune_outputs(self):
+        write_if_changed(os.path.join(self.root, "keep.html"), "k")
+        write_if_changed(os.path.join(self.root, "old", "gone.html"), "g")
+        removed = prune_outputs(self.root, {"keep.html"})
+        self.assertEqual(removed, [os.path.join(self.root, "old", "gone.html")])
+        self.assertEqual(os.listdir(self.root), ["keep.html"])
@@ -0,0 +1,50 @@
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from precompress import compress_outputs
+
+
+class TestCompressOutputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("index.html", "<p>hello</p>" * 100)
+        self.write("tiny.css", "a{}")
+        self.write("image.png", "\x89PNG" * 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.root, rel_path), "w") as f:
+            f.write(text)
+
+    def compress(self, previous=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return compress_outputs(self.root, {"index.html", "tiny.css", "image.png"}, previous)
+
+    def test_writes_sidecars_that_shrink(self):
+        entries = self.compress()
+        self.assertEqual(sorted(entries), ["index.html", "tiny.css"])
+        self.assertTrue(entries["index.html"]["gzip"])
+        self.assertFalse(entries["tiny.css"]["gzip"])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "tiny.css.gz")))
+        with gzip.open(os.path.join(self.root, "index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 100)
+
+    def test_unchanged_sources_are_skipped(self):
+        entries = self.compress()
+        gz_path = os.path.join(self.root, "index.html.gz")
+        os.remove(gz_path)
+        self.compress(entries)
+        self.assertTrue(os.path.exists(gz_path))
+
+        before = os.stat(gz_path).st_mtime_ns
+        os.utime(gz_path, ns=(0, 0))
+        self.assertEqual(self.compress(entries), entries)
+        self.assertEqual(os.stat(gz_path).st_mtime_ns, 0)
+        self.assertNotEqual(before, 0)
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from markdown_blocks import markdown_to_html_node
+from rendercache import RenderCache
+
+
+class TestRenderCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = RenderCache(max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.get("a")
+        cache.put("c", "cccc")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.size, 8)
+
+    def test_updates_are_only_tracked_for_workers(self):
+        cache = RenderCache(max_bytes=100)
+        for i in range(1000):
+            cache.put(str(i), "<p>x</p>")
+            cache.get(str(i))
+        self.assertLessEqual(cache.size, 100)
+        self.assertEqual((cache.added, cache.touched), ({}, []))
+
+        worker = RenderCache(max_bytes=100, track_updates=True)
+        worker.put("a", "<p>a</p>")
+        worker.get("a")
+        self.assertEqual(worker.take_updates(), ({"a": "<p>a</p>"}, ["a"]))
+        self.assertEqual(worker.take_updates(), ({}, []))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "blocks.json")
+            cache = RenderCache(path)
+            cache.put("a", "<p>a</p>")
+            cache.save()
+
+            loaded = RenderCache(path)
+            loaded.load()
+            self.assertEqual(loaded.get("a"), "<p>a</p>")
+
+    def test_cached_blocks_render_the_same(self):
+        markdown = "# Title\n\nSome **bold** text\n\n- one\n- two"
+        cache = RenderCache()
+        first = markdown_to_html_node(markdown, cache).to_html()
+        second = markdown_to_html_node(markdown, cache).to_html()
+        self.assertEqual(first, markdown_to_html_node(markdown).to_html())
+        self.assertEqual(second, first)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+
+    def test_context_separates_entries(self):
+        cache = RenderCache()
+        self.assertNotEqual(cache.key("a", "text"), cache.key("b", "text"))
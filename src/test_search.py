@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+
+from markdown_blocks import markdown_to_html_node
+from rendercache import RenderCache
+from rendercontext import RenderContext
+from search import SearchIndex, page_url, shard_name, tokenize
+
+
+class TestSearch(unittest.TestCase):
+    def test_tokenize_and_shard_name(self):
+        self.assertEqual(tokenize("The **One** ring_bearer, 3rd"), ["the", "one", "ring", "bearer", "3rd"])
+        self.assertEqual(shard_name("ring"), "ri")
+        self.assertEqual(shard_name("a"), "a")
+        self.assertEqual(shard_name("éowyn"), "xc3a96f")
+
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs", "/site/"), "/site/")
+        self.assertEqual(page_url("docs/blog/tom/index.html", "docs", "/"), "/blog/tom/")
+        self.assertEqual(page_url("docs/about.html", "docs", "/"), "/about.html")
+
+    def test_words_are_replayed_from_cache(self):
+        markdown = "# Title\n\nSome **bold** [link](/x) text\n\n```\nnot indexed\n```"
+        cache = RenderCache()
+        context = RenderContext(search=True)
+        results = []
+        for _ in range(2):
+            words, _ = context.begin_page()
+            markdown_to_html_node(markdown, cache, context)
+            results.append(words)
+        self.assertEqual(results[0], ["title", "some", "bold", "link", "text"])
+        self.assertEqual(results[1], results[0])
+
+    def test_write_and_retain(self):
+        index = SearchIndex()
+        index.update("a.md", "/a/", "A", ["ring", "of", "ring"])
+        index.update("b.md", "/b/", "B", ["ring"])
+        with tempfile.TemporaryDirectory() as dest:
+            self.assertEqual(index.write(dest), ["search/of.json", "search/pages.json", "search/ri.json"])
+            with open(os.path.join(dest, "search", "ri.json")) as f:
+                self.assertEqual(json.load(f), {"ring": [[0, 0, 2], [1, 0]]})
+
+            index.retain({"b.md"})
+            index.write(dest)
+            self.assertEqual(index.outputs(), {"search/pages.json", "search/ri.json"})
+            # b.md keeps its id; the one a.md had is free.
+            with open(os.path.join(dest, "search", "pages.json")) as f:
+                self.assertEqual(json.load(f), [None, ["/b/", "B"]])
+            index.update("c.md", "/c/", "C", ["of"])
+            index.write(dest)
+            with open(os.path.join(dest, "search", "pages.json")) as f:
+                self.assertEqual(json.load(f), [["/c/", "C"], ["/b/", "B"]])
+
+    def test_adding_a_page_leaves_unrelated_shards_alone(self):
+        index = SearchIndex()
+        for name, words in (("b", ["ring", "gate"]), ("c", ["shire", "ring"]), ("d", ["mountain"])):
+            index.update(f"{name}.md", f"/{name}/", name.upper(), words)
+        with tempfile.TemporaryDirectory() as dest:
+            index.write(dest)
+            before = self.read_shards(dest)
+            # Sorts before every other URL, so it would have renumbered them.
+            index.update("a.md", "/a/", "A", ["gate"])
+            index.write(dest)
+            after = self.read_shards(dest)
+        changed = set(name for name in after if before.get(name) != after[name])
+        self.assertEqual(changed, {"pages.json", "ga.json"})
+
+    def read_shards(self, dest):
+        shards = {}
+        for name in os.listdir(os.path.join(dest, "search")):
+            with open(os.path.join(dest, "search", name), "rb") as f:
+                shards[name] = f.read()
+        return shards
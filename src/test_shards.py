@@ -0,0 +1,103 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from gencontent import generate_pages_recursive
+from manifest import Manifest
+from shards import load_shards, merge_shards, parse_shard, shard_of, write_shard_manifest
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        for i in range(12):
+            self.write(os.path.join(self.content, f"dir{i % 3}", f"page{i}.md"), f"# Page {i}\n\ntext {i}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self, name, shard=None, assets=None):
+        dest = os.path.join(self.tmp.name, name)
+        manifest = Manifest(os.path.join(self.tmp.name, name + ".json"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, dest, "/", manifest=manifest, shard=shard, assets=assets)
+        if shard is not None:
+            inputs = {"options": manifest.options, "asset_map": manifest.asset_map}
+            write_shard_manifest(dest, shard, inputs, manifest.outputs())
+        return dest
+
+    def read_tree(self, root):
+        outputs = {}
+        for dir_path, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                with open(path) as f:
+                    outputs[os.path.relpath(path, root)] = f.read()
+        return outputs
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/5"), (2, 5))
+        for text in ("0/2", "3/2", "1", "a/b", "1/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shard_of_is_stable_and_uses_forward_slashes(self):
+        self.assertEqual(shard_of("blog/tom/index.md", 4), 1)
+        self.assertEqual(shard_of("blog/tom/index.md", 4), shard_of(os.path.join("blog", "tom", "index.md"), 4))
+        self.assertEqual(set(shard_of(f"page{i}.md", 3) for i in range(30)), {1, 2, 3})
+
+    def test_merged_shards_match_full_build(self):
+        full = self.build("full")
+        roots = [self.build(f"shard{k}", (k, 3)) for k in (1, 2, 3)]
+        shards = load_shards(roots)
+        dest = os.path.join(self.tmp.name, "merged")
+        with contextlib.redirect_stdout(io.StringIO()):
+            outputs = merge_shards(shards, dest)
+        self.assertEqual(outputs, set(self.read_tree(full)))
+        self.assertEqual(self.read_tree(dest), self.read_tree(full))
+        # Every page is built by exactly one shard.
+        self.assertEqual(sum(len(data["files"]) for data in shards), 12)
+
+    def test_collisions_are_reported(self):
+        # Both are rendered to dir0/other.html, by different shards.
+        self.write(os.path.join(self.content, "dir0", "other.md"), "# One\n\nclash")
+        self.write(os.path.join(self.content, "dir0", "other.txt"), "# Two\n\nclash")
+        roots = [self.build(f"shard{k}", (k, 2)) for k in (1, 2)]
+        dest = os.path.join(self.tmp.name, "merged")
+        with self.assertRaisesRegex(ValueError, "other.html: 1-of-2, 2-of-2"):
+            merge_shards(load_shards(roots), dest)
+        self.assertFalse(os.path.exists(dest))
+
+    def test_incomplete_or_mismatched_shards_are_rejected(self):
+        roots = [self.build(f"shard{k}", (k, 3)) for k in (1, 2, 3)]
+        with self.assertRaisesRegex(ValueError, "exactly once"):
+            load_shards(roots[:2])
+        with self.assertRaisesRegex(ValueError, "exactly once"):
+            load_shards(roots + roots[:1])
+        write_shard_manifest(roots[2], (3, 3), {"options": "other"}, [])
+        with self.assertRaisesRegex(ValueError, "different inputs"):
+            load_shards(roots)
+
+    def test_shards_with_different_asset_maps_are_rejected(self):
+        # The template mentions no asset, so only the asset map tells the
+        # static trees apart.
+        roots = [self.build(f"shard{k}", (k, 2), {"/a.png": "/a.1.png"}) for k in (1, 2)]
+        load_shards(roots)
+        roots[1] = self.build("shard2", (2, 2), {"/a.png": "/a.2.png"})
+        with self.assertRaisesRegex(ValueError, "different inputs"):
+            load_shards(roots)
+
+
+if __name__ == "__main__":
+    unittest.main()
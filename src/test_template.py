@@ -0,0 +1,21 @@
+import unittest
+
+from rendercontext import RenderContext
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        result = template.render({"Title": "Home", "Content": "<p>hi</p>"})
+        self.assertEqual(result, "<title>Home</title><main><p>hi</p></main>")
+
+    def test_repeated_and_unknown_slots(self):
+        template = Template("{{ Title }} - {{ Title }} {{ Other }}")
+        self.assertEqual(template.render({"Title": "A"}), "A - A {{ Other }}")
+
+    def test_basepath_applied_to_static_parts(self):
+        template = Template('<link href="/index.css"><img src="/a.png"><a href="//cdn/x">{{ Content }}', RenderContext("/site/"))
+        result = template.render({"Content": '<a href="/x">x</a>'})
+        self.assertEqual(result, '<link href="/site/index.css"><img src="/site/a.png"><a href="//cdn/x"><a href="/x">x</a>')
+        self.assertEqual(template.urls, [("href", "/index.css"), ("src", "/a.png")])
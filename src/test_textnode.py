@@ -9,6 +9,11 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.BOLD)
         self.assertEqual(node, node2)
 
+    def test_has_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
 class TestTextNodeToHTML(unittest.TestCase):
     def test_text_node(self):
         node = TextNode("test_text", TextType.TEXT)
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+from functools import partial
+from http.server import ThreadingHTTPServer
+
+from watch import LIVERELOAD_SCRIPT, LiveReload, PreviewHandler, changed_paths, snapshot
+
+
+class QuietHandler(PreviewHandler):
+    def log_message(self, *args):
+        pass
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_changed_added_and_removed_paths(self):
+        kept = self.write(os.path.join("content", "kept.md"), "kept")
+        edited = self.write(os.path.join("content", "sub", "edited.md"), "old")
+        removed = self.write(os.path.join("content", "removed.md"), "removed")
+        template = self.write("template.html", "{{ Content }}")
+        watched = [os.path.join(self.tmp.name, "content"), template]
+        old_state = snapshot(watched)
+        self.assertEqual(set(old_state), {kept, edited, removed, template})
+        self.assertEqual(changed_paths(old_state, snapshot(watched)), set())
+
+        self.write(os.path.join("content", "sub", "edited.md"), "new text")
+        added = self.write(os.path.join("content", "added.md"), "added")
+        os.remove(removed)
+        self.assertEqual(changed_paths(old_state, snapshot(watched)), {edited, added, removed})
+
+    def test_notify_wakes_waiter(self):
+        livereload = LiveReload()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(livereload.wait(0, 5)))
+        waiter.start()
+        livereload.notify()
+        waiter.join(5)
+        self.assertEqual(results, [1])
+        # Without a notify, wait returns the unchanged version on timeout.
+        self.assertEqual(livereload.wait(1, 0.01), 1)
+
+    def fetch(self, path):
+        handler = partial(QuietHandler, directory=self.tmp.name, livereload=LiveReload())
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}{path}") as response:
+                return response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_script_injected_before_body_end(self):
+        self.write(os.path.join("blog", "index.html"), "<body><p>hi</p></body></html>")
+        self.assertEqual(self.fetch("/blog/"), "<body><p>hi</p>" + LIVERELOAD_SCRIPT + "</body></html>")
+        # The file on disk is left as built.
+        with open(os.path.join(self.tmp.name, "blog", "index.html")) as f:
+            self.assertNotIn("EventSource", f.read())
+
+    def test_script_appended_without_body_end(self):
+        self.write("page.html", "<p>hi</p>")
+        self.assertEqual(self.fetch("/page.html"), "<p>hi</p>" + LIVERELOAD_SCRIPT)
+
+    def test_other_files_served_unchanged(self):
+        self.write("a.css", "body {}")
+        self.assertEqual(self.fetch("/a.css"), "body {}")
+
+
+if __name__ == "__main__":
+    unittest.main()
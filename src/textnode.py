@@ -1,6 +1,6 @@
 from enum import Enum
 
-from htmlnode import HTMLNode, LeafNode
+from htmlnode import HTMLNode, LeafNode, ParentNode
 
 class TextType(Enum):
     TEXT = "text"
@@ -11,29 +11,76 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode():
-    def __init__(self, text: str, text_type: TextType, url=None):
+    # children is only set on bold/italic nodes whose content holds further
+    # inline markup; text is then the plain text of those children.
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text: str, text_type: TextType, url=None, children=None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        self.children = children
     
     def __eq__(self, other) -> bool:
-        return self.text == other.text and self.text_type == other.text_type and self.url == other.url
+        return self.text == other.text and self.text_type == other.text_type and self.url == other.url and self.children == other.children
     
     def __repr__(self):
+        if self.children:
+            return f"TextNode({self.text}, {self.text_type.value}, {self.url}, {self.children})"
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
     
 # probably would fit better in the textnode class, but ah well. Here we are!
-def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
+def text_node_to_html_node(text_node: TextNode, context=None) -> HTMLNode:
     match text_node.text_type:
         case TextType.TEXT:
-            return LeafNode(None, value=text_node.text)
+            return LeafNode(None, value=text_value(text_node.text, context))
         case TextType.BOLD:
-            return LeafNode("b", value=text_node.text)
+            if text_node.children:
+                return ParentNode("b", [text_node_to_html_node(child, context) for child in text_node.children])
+            return LeafNode("b", value=text_value(text_node.text, context))
         case TextType.ITALIC:
-            return LeafNode("i", value=text_node.text)
+            if text_node.children:
+                return ParentNode("i", [text_node_to_html_node(child, context) for child in text_node.children])
+            return LeafNode("i", value=text_value(text_node.text, context))
         case TextType.CODE:
             return LeafNode("code", value=text_node.text)
         case TextType.LINK:
-            return LeafNode("a", value=text_node.text, props={"href": text_node.url})
+            return LeafNode("a", value=text_value(text_node.text, context), props={"href": resolve_url(text_node.url, context)})
+        case TextType.IMAGE:
+            return LeafNode("img", value="", props={"href": resolve_url(text_node.url, context), "alt": text_node.text})
+
+
+def text_node_to_html(text_node: TextNode, context=None) -> str:
+    # Renders the same markup as text_node_to_html_node(...).to_html(), but
+    # straight to a string, without building the node.
+    match text_node.text_type:
+        case TextType.TEXT:
+            return text_value(text_node.text, context)
+        case TextType.BOLD:
+            if text_node.children:
+                return "<b>" + "".join([text_node_to_html(child, context) for child in text_node.children]) + "</b>"
+            return f"<b>{text_value(text_node.text, context)}</b>"
+        case TextType.ITALIC:
+            if text_node.children:
+                return "<i>" + "".join([text_node_to_html(child, context) for child in text_node.children]) + "</i>"
+            return f"<i>{text_value(text_node.text, context)}</i>"
+        case TextType.CODE:
+            return f"<code>{text_node.text}</code>"
+        case TextType.LINK:
+            href = resolve_url(text_node.url, context) or ""
+            return f'<a href="{href}">{text_value(text_node.text, context)}</a>'
         case TextType.IMAGE:
-            return LeafNode("img", value="", props={"href": text_node.url, "alt": text_node.text})
\ No newline at end of file
+            href = resolve_url(text_node.url, context) or ""
+            return f'<img href="{href}" alt="{text_node.text or ""}"/>'
+
+
+def text_value(text, context):
+    if context is None:
+        return text
+    return context.text(text)
+
+
+def resolve_url(url, context):
+    if context is None:
+        return url
+    return context.resolve_url(url)
\ No newline at end of file
@@ -0,0 +1,185 @@
+import argparse
+import os
+import threading
+import time
+import traceback
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from copystatic import sync_files
+from gencontent import generate_pages_recursive
+from main import default_basepath, dir_path_content, dir_path_public, dir_path_static, manifest_path, template_path
+from manifest import Manifest
+
+
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + LIVERELOAD_PATH + "\").onmessage = function () { location.reload(); };</script>"
+)
+
+
+class LiveReload():
+    # Counts finished rebuilds; open event streams wait for the count to move.
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, livereload=None, **kwargs):
+        self.livereload = livereload
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        url_path = urlsplit(self.path).path
+        if url_path == LIVERELOAD_PATH:
+            self.send_events()
+            return
+        file_path = self.translate_path(self.path)
+        if url_path.endswith("/") and os.path.isdir(file_path):
+            file_path = os.path.join(file_path, "index.html")
+        if file_path.endswith(".html") and os.path.isfile(file_path):
+            self.send_page(file_path)
+            return
+        super().do_GET()
+
+    def send_page(self, file_path):
+        # The reload script is added while serving, so the files in the
+        # output directory stay identical to a normal build.
+        with open(file_path, "r") as f:
+            html = f.read()
+        if "</body>" in html:
+            html = html.replace("</body>", LIVERELOAD_SCRIPT + "</body>", 1)
+        else:
+            html += LIVERELOAD_SCRIPT
+        body = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        version = self.livereload.version
+        try:
+            while True:
+                new_version = self.livereload.wait(version, 15)
+                if new_version == version:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    version = new_version
+                    self.wfile.write(b"data: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def snapshot(paths):
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for dir_path, _, filenames in os.walk(path):
+            for filename in filenames:
+                file_path = os.path.join(dir_path, filename)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                state[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+def changed_paths(old_state, new_state):
+    changed = set()
+    for path, stat in new_state.items():
+        if old_state.get(path) != stat:
+            changed.add(path)
+    for path in old_state:
+        if path not in new_state:
+            changed.add(path)
+    return changed
+
+
+def rebuild(changed, manifest, basepath):
+    static_prefix = os.path.join(dir_path_static, "")
+    static_changes = set(path for path in changed if path.startswith(static_prefix))
+    if static_changes:
+        manifest.assets = sync_files(dir_path_static, dir_path_public, manifest.assets)
+    if len(static_changes) != len(changed):
+        generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath, manifest=manifest)
+    manifest.save()
+
+
+def serve(port, livereload):
+    handler = partial(PreviewHandler, directory=dir_path_public, livereload=livereload)
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rebuild the site on changes and serve it with live reload.")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between checks for changes")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    basepath = default_basepath
+    watched = [dir_path_content, dir_path_static, template_path]
+
+    print("Building site...")
+    manifest = Manifest(manifest_path)
+    manifest.load()
+    manifest.assets = sync_files(dir_path_static, dir_path_public, manifest.assets)
+    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath, manifest=manifest)
+    manifest.save()
+
+    livereload = LiveReload()
+    serve(args.port, livereload)
+    print(f"Serving {dir_path_public} at http://localhost:{args.port}/ (watching for changes)")
+
+    state = snapshot(watched)
+    try:
+        while True:
+            time.sleep(args.interval)
+            new_state = snapshot(watched)
+            changed = changed_paths(state, new_state)
+            state = new_state
+            if not changed:
+                continue
+            print("Rebuilding...")
+            try:
+                rebuild(changed, manifest, basepath)
+            except Exception:
+                traceback.print_exc()
+                continue
+            livereload.notify()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()